@@ -0,0 +1,52 @@
+"""Представление объектов в JSON.
+
+Каждое поле — функция (объект, запрос) -> значение, поэтому
+с параметром fields= вычисляются только запрошенные поля.
+"""
+
+
+def _file_url(file_, request):
+    return request.build_absolute_uri(file_.url) if file_ else None
+
+
+POST_FIELDS = {
+    'id': lambda post, request: post.pk,
+    'text': lambda post, request: post.text,
+    'pub_date': lambda post, request: post.pub_date.isoformat(),
+    'author': lambda post, request: post.author.username,
+    'group': lambda post, request: post.group and post.group.slug,
+    'image': lambda post, request: _file_url(post.image, request),
+    'comments_count': lambda post, request: post.comments_count,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment, request: comment.pk,
+    'post': lambda comment, request: comment.post_id,
+    'author': lambda comment, request: comment.author.username,
+    'text': lambda comment, request: comment.text,
+    'created': lambda comment, request: comment.created.isoformat(),
+}
+
+GROUP_FIELDS = {
+    'id': lambda group, request: group.pk,
+    'slug': lambda group, request: group.slug,
+    'title': lambda group, request: group.title,
+    'description': lambda group, request: group.description,
+    'posts_count': lambda group, request: group.posts_count,
+}
+
+PROFILE_FIELDS = {
+    'username': lambda user, request: user.username,
+    'full_name': lambda user, request: user.get_full_name(),
+    'bio': lambda user, request: user.profile.bio,
+    'profile_pic': lambda user, request: _file_url(
+        user.profile.profile_pic, request
+    ),
+    'posts_count': lambda user, request: user.profile.posts_count,
+    'followers_count': lambda user, request: user.profile.followers_count,
+    'following_count': lambda user, request: user.profile.following_count,
+}
+
+
+def serialize(obj, fields, request):
+    return {name: fields[name](obj, request) for name in fields}
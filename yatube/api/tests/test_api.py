@@ -0,0 +1,186 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_NUM=3, COMMENTS_NUM=2)
+class ApiTests(TestCase):
+    """Тесты JSON API."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f'Коммент {number}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def walk(self, url, client=None):
+        """Все объекты списка, пройденные по курсорам."""
+        client = client or self.client
+        results, cursor = [], None
+        while True:
+            data = client.get(url, {'cursor': cursor} if cursor else {})
+            data = data.json()
+            results += data['results']
+            cursor = data['next']
+            if cursor is None:
+                return results
+
+    def test_lists_walk_by_cursor(self):
+        """Списки постов листаются курсором без пропусков и повторов."""
+        expected = [post.pk for post in reversed(self.posts)]
+        urls = (
+            reverse('api:posts'),
+            reverse('api:group_posts', args=(self.group.slug,)),
+            reverse('api:profile_posts', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    [post['id'] for post in self.walk(url)], expected
+                )
+        self.assertEqual(
+            [post['id'] for post in self.walk(
+                reverse('api:follow'), self.reader_client
+            )],
+            expected
+        )
+
+    def test_objects(self):
+        post = self.client.get(
+            reverse('api:post_detail', args=(self.posts[0].pk,))
+        ).json()
+        self.assertEqual(post['author'], 'author')
+        self.assertEqual(post['group'], 'group')
+        self.assertEqual(post['comments_count'], 3)
+        profile = self.client.get(
+            reverse('api:profile', args=('author',))
+        ).json()
+        self.assertEqual(profile['full_name'], 'Лев Толстой')
+        self.assertEqual(profile['posts_count'], 5)
+        self.assertEqual(profile['followers_count'], 1)
+        groups = self.client.get(reverse('api:groups')).json()['results']
+        self.assertEqual([group['slug'] for group in groups], ['group'])
+        comments = self.walk(
+            reverse('api:post_comments', args=(self.posts[0].pk,))
+        )
+        self.assertEqual(
+            [comment['text'] for comment in comments],
+            ['Коммент 0', 'Коммент 1', 'Коммент 2']
+        )
+
+    def test_sparse_fields(self):
+        """fields= оставляет в ответе только перечисленные поля."""
+        response = self.client.get(reverse('api:posts'), {'fields': 'id,text'})
+        for post in response.json()['results']:
+            self.assertEqual(set(post), {'id', 'text'})
+        response = self.client.get(reverse('api:posts'), {'fields': 'id,pk'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pk', response.json()['detail'])
+
+    def test_errors(self):
+        response = self.client.get(reverse('api:profile', args=('nobody',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено.'})
+        self.assertEqual(self.client.get(reverse('api:follow')).status_code,
+                         401)
+        self.assertEqual(self.client.post(reverse('api:posts')).status_code,
+                         405)
+
+    def test_not_modified(self):
+        """Неизменная страница отдаётся как 304 без запросов к ленте."""
+        urls = (
+            (reverse('api:posts'), 0),
+            (reverse('api:post_detail', args=(self.posts[0].pk,)), 0),
+            (reverse('api:groups'), 0),
+            (reverse('api:group_posts', args=(self.group.slug,)), 1),
+            (reverse('api:profile', args=(self.author.username,)), 1),
+        )
+        for url, queries in urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(len(context.captured_queries), queries)
+
+    def test_etag_changes_with_data(self):
+        """Новый пост, комментарий или подписка меняют ETag."""
+        changes = (
+            (reverse('api:posts'), lambda: Post.objects.create(
+                text='Новый', author=self.author
+            )),
+            (reverse('api:post_comments', args=(self.posts[1].pk,)),
+             lambda: Comment.objects.create(
+                 post=self.posts[1], author=self.reader, text='Новый'
+            )),
+            # comments_count в карточках списков.
+            (reverse('api:posts'), lambda: Comment.objects.create(
+                post=self.posts[-1], author=self.reader, text='Новый'
+            )),
+            (reverse('api:group_posts', args=(self.group.slug,)),
+             lambda: Comment.objects.create(
+                 post=self.posts[-1], author=self.reader, text='Новый'
+            )),
+            (reverse('api:profile_posts', args=(self.author.username,)),
+             lambda: Comment.objects.get(text='Коммент 0').delete()),
+            (reverse('api:profile', args=(self.author.username,)),
+             lambda: Follow.objects.create(
+                 user=self.author, author=self.reader
+            )),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_etag(self):
+        """ETag ленты подписок свой у пользователя и зависит от его авторов."""
+        stranger = User.objects.create_user(username='stranger')
+        other_reader = User.objects.create_user(username='other')
+        Follow.objects.create(user=other_reader, author=self.author)
+        other_client = Client()
+        other_client.force_login(other_reader)
+        url = reverse('api:follow')
+        etag = self.reader_client.get(url)['ETag']
+        self.assertNotEqual(other_client.get(url)['ETag'], etag)
+        Post.objects.create(text='Чужой пост', author=stranger)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        Comment.objects.create(
+            post=self.posts[-1], author=self.reader, text='Новый'
+        )
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
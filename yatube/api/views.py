@@ -0,0 +1,218 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_safe
+from django.views.decorators.vary import vary_on_cookie
+
+from posts.fragments import generation
+from posts.models import Group, Post, User
+from posts.paginators import CursorPaginator
+from posts.views import comments_page, follow_page
+
+from .serializers import (
+    COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS, serialize,
+)
+
+VERSION = 'v1'
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая отдаётся клиенту как JSON."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def etag(request, scopes):
+    """ETag ответа из поколений кэша фрагментов его областей.
+
+    В ETag входит пользователь: у разных пользователей могут
+    совпасть поколения при разных ответах.
+
+    Поколения читаются из кэша, поэтому совпадение If-None-Match
+    обходится без запросов к ленте. scopes=None — ETag не нужен.
+    """
+    if scopes is None:
+        return None
+    parts = [VERSION, request.get_full_path(), str(request.user.pk)]
+    parts += [str(generation(scope)) for scope in scopes]
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def api_view(scopes):
+    """Read-only view API: ETag/If-None-Match и ошибки в JSON.
+
+    scopes(request, **kwargs) возвращает области кэша фрагментов,
+    от которых зависит ответ, или None, если ETag считать не нужно.
+    """
+    def decorator(view):
+        @require_safe
+        @condition(etag_func=lambda request, **kwargs: etag(
+            request, scopes(request, **kwargs)
+        ))
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            try:
+                return view(request, **kwargs)
+            except Http404:
+                return json_response({'detail': 'Не найдено.'}, status=404)
+            except ApiError as error:
+                return json_response(
+                    {'detail': error.detail}, status=error.status
+                )
+        return wrapper
+    return decorator
+
+
+def selected_fields(request, available):
+    """Поля из параметра fields=a,b,c; без параметра — все."""
+    names = [
+        name.strip()
+        for name in request.GET.get('fields', '').split(',')
+        if name.strip()
+    ]
+    if not names:
+        return available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(400, 'Неизвестные поля: %s.' % ', '.join(unknown))
+    return {name: available[name] for name in names}
+
+
+def cursor_page(request, queryset, key='-pub_date'):
+    return CursorPaginator(queryset, settings.POSTS_NUM, key=key).get_page(
+        request.GET.get('cursor')
+    )
+
+
+def page_response(request, page_obj, available):
+    fields = selected_fields(request, available)
+    return json_response({
+        'results': [serialize(obj, fields, request) for obj in page_obj],
+        'next': page_obj.paginator.next_cursor,
+        'previous': page_obj.paginator.previous_cursor,
+    })
+
+
+def object_response(request, obj, available):
+    return json_response(
+        serialize(obj, selected_fields(request, available), request)
+    )
+
+
+def _group_scopes(request, slug):
+    pk = Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    return None if pk is None else (
+        f'group:{pk}', f'comments:group:{pk}', 'authors'
+    )
+
+
+def _author_pk(username):
+    return User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+
+
+def _profile_scopes(request, username):
+    pk = _author_pk(username)
+    return None if pk is None else (f'author:{pk}', 'authors')
+
+
+def _profile_posts_scopes(request, username):
+    pk = _author_pk(username)
+    return None if pk is None else (
+        f'author:{pk}', f'comments:author:{pk}', 'groups', 'authors'
+    )
+
+
+def _follow_scopes(request):
+    """Подписки и авторы ленты; чужие посты её ETag не меняют.
+
+    groups — из-за адресов групп в карточках постов, сами посты
+    этой области не сдвигают; comments:author — из-за comments_count.
+    """
+    if not request.user.is_authenticated:
+        return None
+    author_ids = list(
+        request.user.follower.values_list('author_id', flat=True)
+    )
+    return (
+        f'follow:{request.user.pk}', 'groups',
+        *(f'author:{author_id}' for author_id in author_ids),
+        *(f'comments:author:{author_id}' for author_id in author_ids),
+    )
+
+
+@api_view(lambda request: ('index', 'comments', 'groups', 'authors'))
+def posts_list(request):
+    posts = Post.objects.select_related('author', 'group')
+    return page_response(request, cursor_page(request, posts), POST_FIELDS)
+
+
+@api_view(lambda request, post_id: (f'post:{post_id}', 'groups', 'authors'))
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    return object_response(request, post, POST_FIELDS)
+
+
+@api_view(lambda request, post_id: (f'post:{post_id}', 'authors'))
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    comments = comments_page(post, request.GET.get('cursor'))
+    return page_response(request, comments, COMMENT_FIELDS)
+
+
+@api_view(lambda request: ('groups', 'index'))
+def groups_list(request):
+    """Все группы одним списком: их немного, и ведёт их админка."""
+    fields = selected_fields(request, GROUP_FIELDS)
+    return json_response({'results': [
+        serialize(group, fields, request)
+        for group in Group.objects.order_by('title')
+    ]})
+
+
+@api_view(_group_scopes)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = group.posts.select_related('author')
+    return page_response(request, cursor_page(request, posts), POST_FIELDS)
+
+
+@api_view(_profile_scopes)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    return object_response(request, author, PROFILE_FIELDS)
+
+
+@api_view(_profile_posts_scopes)
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related('group')
+    return page_response(request, cursor_page(request, posts), POST_FIELDS)
+
+
+@vary_on_cookie
+@api_view(_follow_scopes)
+def follow_feed(request):
+    """Лента подписок; пользователь определяется по сессии."""
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Требуется авторизация.')
+    return page_response(
+        request, follow_page(request, cursor_page), POST_FIELDS
+    )
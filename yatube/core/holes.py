@@ -0,0 +1,66 @@
+import re
+
+from django.template.loader import render_to_string
+
+# <!--hole:имя:арг1:арг2--> — место для куска страницы, который
+# зависит от пользователя и дорисовывается при каждом ответе.
+HOLE = re.compile(r'<!--hole:(\w+)((?::[\w.@+-]*)*)-->')
+ARGUMENT = re.compile(r'[\w.@+-]*')
+
+_holes = {}
+
+
+def register(name):
+    """Регистрирует функцию (request, *args) -> HTML для дыры name."""
+    def decorator(func):
+        _holes[name] = func
+        return func
+    return decorator
+
+
+def placeholder(name, *args):
+    if name not in _holes:
+        raise ValueError(f'Неизвестная дыра {name!r}')
+    args = [str(arg) for arg in args]
+    for arg in args:
+        if not ARGUMENT.fullmatch(arg):
+            raise ValueError(f'Недопустимый аргумент дыры {arg!r}')
+    return '<!--hole:%s-->' % ':'.join([name, *args])
+
+
+def fill(request, content):
+    """Подставляет в HTML содержимое дыр для текущего пользователя."""
+    def replace(match):
+        args = match.group(2).split(':')[1:]
+        return _holes[match.group(1)](request, *args)
+    return HOLE.sub(replace, content)
+
+
+class HolePunchMiddleware:
+    """Заполняет дыры в HTML-ответах.
+
+    Стоит после AuthenticationMiddleware: дырам нужен request.user.
+    Благодаря этому остальная страница одна для всех пользователей
+    и может кэшироваться целиком (posts.page_cache.shared_page).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not response.streaming
+            and response.get('Content-Type', '').startswith('text/html')
+            and b'<!--hole:' in response.content
+        ):
+            response.content = fill(
+                request, response.content.decode(response.charset)
+            ).encode(response.charset)
+        return response
+
+
+@register('header_user')
+def header_user(request):
+    """Ссылки пользователя или входа в шапке."""
+    return render_to_string('includes/header_user.html', request=request)
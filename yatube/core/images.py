@@ -0,0 +1,183 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .metrics import registry
+
+# Форматы, которые сохраняются как есть; остальные перекодируются в JPEG
+# (или PNG, если у картинки есть прозрачность).
+KEPT_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+class NormalizedImage(ContentFile):
+    """Подготовленная к хранению картинка с размерами и хэшем."""
+
+    def __init__(self, content, name, width, height):
+        super().__init__(content, name=name)
+        self.width = width
+        self.height = height
+        self.sha256 = hashlib.sha256(content).hexdigest()
+
+
+class OversizedUpload(UploadedFile):
+    """Файл, оборванный UploadLimitHandler: только имя и размер."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(BytesIO(), name, content_type, size)
+
+
+class UploadLimitHandler(FileUploadHandler):
+    """Обрывает приём файла больше IMAGE_MAX_UPLOAD_BYTES.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS: байты сверх лимита не попадают
+    ни в память, ни во временный файл. Вместо файла форма получает
+    OversizedUpload, и UploadLimitFormMixin выводит ошибку размера.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_MAX_UPLOAD_BYTES:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received > settings.IMAGE_MAX_UPLOAD_BYTES:
+            return OversizedUpload(
+                self.file_name, self.content_type, self.received
+            )
+        return None
+
+
+class UploadLimitFormMixin:
+    """ModelForm с картинками: оборванная загрузка — ошибка поля.
+
+    OversizedUpload убирается из files до проверки полей, иначе
+    ImageField сообщил бы о битом изображении; clean_image_field
+    выводит вместо этого ошибку размера.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.oversized = {}
+        for name, upload in list(self.files.items()):
+            if isinstance(upload, OversizedUpload):
+                if not self.oversized:
+                    self.files = self.files.copy()
+                self.oversized[name] = upload
+                del self.files[name]
+
+
+def _check_size(upload):
+    if upload.size > settings.IMAGE_MAX_UPLOAD_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: не более %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.IMAGE_MAX_UPLOAD_BYTES)},
+        )
+
+
+def _check_pixels(image):
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение: %(width)s×%(height)s.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+
+
+def _target_format(image):
+    if image.format in KEPT_FORMATS:
+        return image.format
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def _is_animated(image):
+    return getattr(image, 'is_animated', False)
+
+
+def normalize_image(upload):
+    """Проверяет и нормализует загруженную картинку.
+
+    Размер файла и число пикселей проверяются до декодирования: Pillow
+    читает из потока только заголовок. Затем картинка поворачивается
+    по EXIF, уменьшается до IMAGE_MAX_EDGE по длинной стороне
+    и пересохраняется без метаданных.
+    """
+    _check_size(upload)
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось прочитать изображение.', code='invalid_image'
+        )
+    _check_pixels(image)
+    image_format = _target_format(image)
+    name = '%s.%s' % (
+        os.path.splitext(os.path.basename(upload.name))[0],
+        KEPT_FORMATS.get(image_format, 'jpg'),
+    )
+    if _is_animated(image):
+        # Анимацию не пересобираем: хватает проверки лимитов.
+        upload.seek(0)
+        return NormalizedImage(upload.read(), name, *image.size)
+
+    max_edge = settings.IMAGE_MAX_EDGE
+    if image_format == 'JPEG':
+        # Декодирование сразу в уменьшенном масштабе (1/2, 1/4, 1/8).
+        image.draft('RGB', (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    output = BytesIO()
+    options = {'format': image_format}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.IMAGE_QUALITY
+    if image_format == 'JPEG':
+        options['optimize'] = True
+    if image_format == 'GIF' and 'transparency' in image.info:
+        options['transparency'] = image.info['transparency']
+    image.save(output, **options)
+    return NormalizedImage(output.getvalue(), name, *image.size)
+
+
+def clean_image_field(form, name):
+    """clean_<name> для ModelForm: нормализует новую картинку.
+
+    Размеры и хэш записываются в поля <name>_width, <name>_height
+    и <name>_hash модели, чтобы потом не открывать файл ради них.
+    """
+    oversized = getattr(form, 'oversized', {}).get(name)
+    if oversized is not None:
+        _check_size(oversized)
+    image = form.cleaned_data.get(name)
+    if isinstance(image, UploadedFile):
+        with registry.time(
+            'yatube_image_processing_seconds', operation='upload'
+        ):
+            image = normalize_image(image)
+        meta = (image.width, image.height, image.sha256)
+    elif image is False:
+        meta = (None, None, '')
+    else:
+        return image
+    for suffix, value in zip(('width', 'height', 'hash'), meta):
+        setattr(form.instance, f'{name}_{suffix}', value)
+    return image
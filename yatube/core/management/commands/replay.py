@@ -0,0 +1,252 @@
+import json
+import multiprocessing
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import Resolver404, get_resolver, resolve, reverse
+
+from core import replay
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'users')
+# Входом и выходом клиенты управляют сами, иначе сессии разъедутся.
+SESSION_VIEWS = ('users:login', 'users:logout')
+POST_VIEWS = ('posts:add_comment', 'posts:post_create')
+# Синтетические адреса ведут на свежие объекты: их читают чаще всего.
+POOL_SIZE = 1000
+# Прирост пропускной способности меньше 10% — сервер насыщен.
+SATURATION_GAIN = 1.1
+
+
+def url_params():
+    """Имена параметров адресов view: {'posts:profile': ['username']}."""
+    return {
+        f'{resolver.namespace}:{pattern.name}': list(
+            pattern.pattern.converters
+        )
+        for resolver in get_resolver().url_patterns
+        if getattr(resolver, 'namespace', None) in NAMESPACES
+        for pattern in resolver.url_patterns
+    }
+
+
+def object_pools():
+    """Значения параметров адресов из базы."""
+    return {
+        'post_id': list(Post.objects.values_list('pk', flat=True)
+                        .order_by('-pk')[:POOL_SIZE]),
+        'comment_id': list(Comment.objects.values_list('pk', flat=True)
+                           .order_by('-pk')[:POOL_SIZE]),
+        'slug': list(Group.objects.values_list('slug', flat=True)
+                     [:POOL_SIZE]),
+        'username': list(User.objects.values_list('username', flat=True)
+                         .order_by('-pk')[:POOL_SIZE]),
+    }
+
+
+def traffic_mix(mix, params, pools):
+    """View и веса смеси; для каждого view должны найтись параметры."""
+    for view in mix:
+        if view not in params or not all(
+            pools.get(name) for name in params[view]
+        ):
+            raise CommandError(f'Нельзя построить адрес {view}')
+    return list(mix), list(mix.values())
+
+
+def saturation(rounds):
+    """Число процессов, после которого пропускная способность не растёт."""
+    for previous, current in zip(rounds, rounds[1:]):
+        if current['rps'] < previous['rps'] * SATURATION_GAIN:
+            return previous['workers']
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Воспроизводит журнал доступа или синтетический профиль трафика '
+        'против запущенного сайта несколькими процессами и выводит '
+        'пропускную способность, задержки и ошибки по view.'
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--log', help='Журнал доступа в формате common/combined'
+        )
+        source.add_argument(
+            '--profile', help='JSON-профиль синтетического трафика'
+        )
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес проверяемого развёртывания'
+        )
+        parser.add_argument(
+            '--workers', default='1,2,4,8',
+            help='Числа параллельных процессов через запятую, по прогону '
+                 'на каждое'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=0,
+            help='Сколько запросов журнала воспроизвести (0 — все)'
+        )
+        parser.add_argument(
+            '--password', default='yatube-seed',
+            help='Пароль пользователей (как у команды seed)'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=10,
+            help='Таймаут запроса, секунд'
+        )
+        parser.add_argument('--output', help='Записать итоги в JSON-файл')
+
+    def from_log(self, path, limit):
+        entries, skipped = [], 0
+        try:
+            file_ = open(path, encoding='utf-8', errors='replace')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть журнал: {error}')
+        with file_:
+            for entry in replay.parse_log(file_):
+                try:
+                    match = resolve(urlsplit(entry['path']).path)
+                except Resolver404:
+                    match = None
+                if (match is None or match.namespace not in NAMESPACES
+                        or match.view_name in SESSION_VIEWS):
+                    skipped += 1
+                    continue
+                entry['view'] = match.view_name
+                entries.append(entry)
+                if len(entries) == limit:
+                    break
+        if skipped:
+            self.stdout.write(f'Пропущено строк журнала: {skipped}')
+        return entries
+
+    def from_profile(self, path):
+        """Запросы по профилю: смесь view для гостей и вошедших.
+
+        {"requests": 1000, "clients": 50, "users": 0.2, "seed": 1,
+         "guest": {"posts:index": 5, ...}, "user": {...}}
+        """
+        try:
+            with open(path, encoding='utf-8') as file_:
+                profile = json.load(file_)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать профиль: {error}')
+        rng = random.Random(profile.get('seed'))
+        params, pools = url_params(), object_pools()
+        words = replay.POST_TEXT.split()
+        for text in Post.objects.values_list('text', flat=True)[:100]:
+            words.extend(text.split()[:3])
+        mixes = {
+            kind: traffic_mix(profile.get(kind, {}), params, pools)
+            for kind in ('guest', 'user')
+        }
+        if not pools['username'] and profile.get('users'):
+            raise CommandError('В базе нет пользователей')
+        clients = [
+            rng.choice(pools['username'])
+            if rng.random() < profile.get('users', 0) else None
+            for _ in range(profile.get('clients', 1))
+        ]
+        entries = []
+        for _ in range(profile.get('requests', 100)):
+            client = rng.randrange(len(clients))
+            user = clients[client]
+            views, weights = mixes['guest' if user is None else 'user']
+            if not views:
+                continue
+            view = rng.choices(views, weights)[0]
+            path = reverse(view, kwargs={
+                name: rng.choice(pools[name]) for name in params[view]
+            })
+            if view == 'posts:search':
+                path += '?' + urlencode({'q': rng.choice(words)})
+            entries.append({
+                'client': str(client),
+                'user': user,
+                'method': 'POST' if view in POST_VIEWS else 'GET',
+                'path': path,
+                'view': view,
+            })
+        return entries
+
+    def run(self, entries, workers, options):
+        shares = replay.split(entries, workers)
+        # Процессы наследуют открытые соединения; им база не нужна.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            start = time.perf_counter()
+            parts = pool.starmap(replay.run_worker, [
+                (options['base_url'], share, options['password'],
+                 options['timeout'])
+                for share in shares
+            ])
+            elapsed = time.perf_counter() - start
+        return replay.summarize(
+            [record for part in parts for record in part], elapsed
+        )
+
+    def report(self, workers, summary):
+        if not summary:
+            self.stdout.write(self.style.WARNING(
+                f'Процессов: {workers}, запросов нет'
+            ))
+            return
+        total = summary['*']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Процессов: {workers}, запросов: {total["requests"]}, '
+            f'{total["rps"]} в секунду, ошибок {total["error_rate"]:.1%}'
+        ))
+        self.stdout.write(
+            f'  {"view":<28}{"запросов":>9}{"в сек":>8}{"p50 мс":>9}'
+            f'{"p95 мс":>9}{"p99 мс":>9}{"ошибки":>8}'
+        )
+        for view, stats in summary.items():
+            line = (
+                f'  {view:<28}{stats["requests"]:>9}{stats["rps"]:>8}'
+                f'{stats["p50_ms"]:>9}{stats["p95_ms"]:>9}'
+                f'{stats["p99_ms"]:>9}{stats["error_rate"]:>8.1%}'
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if stats['error_rate'] else line
+            )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers: числа через запятую')
+        if options['log']:
+            entries = self.from_log(options['log'], options['limit'])
+        else:
+            entries = self.from_profile(options['profile'])
+        if not entries:
+            raise CommandError('Нет запросов для воспроизведения')
+        rounds = []
+        for workers in levels:
+            summary = self.run(entries, workers, options)
+            self.report(workers, summary)
+            rounds.append({
+                'workers': workers,
+                'rps': summary['*']['rps'] if summary else 0,
+                'views': summary,
+            })
+        point = saturation(rounds)
+        if point is not None:
+            self.stdout.write(self.style.WARNING(
+                f'Насыщение: больше {point} процессов пропускная '
+                'способность не растёт'
+            ))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file_:
+                json.dump(rounds, file_, ensure_ascii=False, indent=2)
@@ -0,0 +1,74 @@
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ORDERINGS = {
+    'total': lambda stats: stats['total_ms'],
+    'max': lambda stats: stats['max_ms'],
+    'count': lambda stats: stats['count'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Сводка по журналу медленных запросов: худшие запросы и их планы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.SLOW_QUERY_LOG,
+            help='Файл журнала медленных запросов'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько запросов вывести'
+        )
+        parser.add_argument(
+            '--order', choices=ORDERINGS, default='total',
+            help='Сортировка: суммарное время, максимум или число запросов'
+        )
+
+    def read(self, path):
+        stats = OrderedDict()
+        try:
+            file_ = open(path, encoding='utf-8')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть журнал: {error}')
+        with file_:
+            for line in file_:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                item = stats.setdefault(entry['fingerprint'], {
+                    'count': 0, 'total_ms': 0, 'max_ms': 0, 'views': set(),
+                })
+                item['count'] += 1 + entry['suppressed']
+                item['total_ms'] += (
+                    entry['duration_ms'] + entry['suppressed_ms']
+                )
+                item['max_ms'] = max(item['max_ms'], entry['duration_ms'])
+                item['views'].add(entry['view'] or entry['path'])
+                # Последняя запись: план мог измениться после миграции.
+                item['sql'] = entry['sql']
+                item['plan'] = entry['plan']
+        return stats
+
+    def handle(self, *args, **options):
+        stats = self.read(options['log'])
+        worst = sorted(
+            stats.items(), key=lambda item: ORDERINGS[options['order']](
+                item[1]
+            ), reverse=True
+        )[:options['limit']]
+        for key, item in worst:
+            self.stdout.write(self.style.WARNING(
+                f'{key}: {item["count"]} раз, всего {item["total_ms"]:.1f} мс,'
+                f' максимум {item["max_ms"]:.1f} мс'
+            ))
+            self.stdout.write('  view: ' + ', '.join(sorted(item['views'])))
+            self.stdout.write('  ' + item['sql'])
+            for step in item['plan'] or ():
+                self.stdout.write('    ' + step)
+        if not worst:
+            self.stdout.write(self.style.SUCCESS('Медленных запросов нет'))
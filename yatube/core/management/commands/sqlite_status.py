@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.sqlite import DIAGNOSTIC_PRAGMAS, pragma
+
+CHECKPOINTS = ('passive', 'full', 'restart', 'truncate')
+
+
+class Command(BaseCommand):
+    help = (
+        'Действующие прагмы соединения SQLite и состояние журнала WAL '
+        'после контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default', help='Псевдоним базы'
+        )
+        parser.add_argument(
+            '--checkpoint', choices=CHECKPOINTS, default='passive',
+            help='Режим wal_checkpoint; passive не ждёт читателей'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'База {options["database"]} — не SQLite')
+        connection.ensure_connection()
+        raw = connection.connection
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            connection.settings_dict['NAME']
+        ))
+        for name in (*settings.SQLITE_PRAGMAS, *DIAGNOSTIC_PRAGMAS):
+            self.stdout.write(f'  {name:<20}{pragma(raw, name)}')
+        if pragma(raw, 'journal_mode') != 'wal':
+            self.stdout.write(self.style.WARNING('Журнал WAL не используется'))
+            return
+        busy, frames, checkpointed = raw.execute(
+            f'PRAGMA wal_checkpoint({options["checkpoint"]})'
+        ).fetchone()
+        line = (
+            f'Контрольная точка {options["checkpoint"]}: кадров в WAL '
+            f'{frames}, перенесено в базу {checkpointed}'
+        )
+        self.stdout.write(
+            self.style.WARNING(line + ', мешали читатели') if busy
+            else self.style.SUCCESS(line)
+        )
@@ -0,0 +1,352 @@
+"""Метрики в текстовом формате Prometheus.
+
+Каждый процесс копит значения в памяти и не чаще раза
+в METRICS_FLUSH_INTERVAL секунд сбрасывает их в свой файл в METRICS_DIR;
+/metrics складывает файлы всех процессов, поэтому при нескольких
+воркерах WSGI данные сходятся. Файлы завершившихся процессов
+прибавляются к общему файлу retired и удаляются: счётчики не теряют
+накопленного, а каталог не растёт с каждым перезапуском воркера.
+"""
+import atexit
+import glob
+import json
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:  # Windows: один процесс runserver, сводить нечего.
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+COUNTERS = {
+    'yatube_requests_total': 'Ответы по view, методу и статусу.',
+    'yatube_cache_requests_total': 'Чтения кэша по виду ключа и результату.',
+}
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время ответа view, секунды.', LATENCY_BUCKETS
+    ),
+    'yatube_request_db_queries': (
+        'SQL-запросов на один ответ.', QUERY_BUCKETS
+    ),
+    'yatube_image_processing_seconds': (
+        'Обработка загрузок и создание миниатюр, секунды.', LATENCY_BUCKETS
+    ),
+}
+HIT_RATIO = 'yatube_cache_hit_ratio'
+
+# Вид ключа кэша по префиксу; прочие ключи учитываются как other.
+CACHE_KINDS = (
+    ('template.cache.', 'fragment'),
+    ('fragments:', 'generation'),
+    ('pages:', 'page'),
+    ('shared-pages:', 'shared_page'),
+    ('sorl-thumbnail', 'thumbnail'),
+    ('thumbnails:', 'thumbnail'),
+)
+
+
+RETIRED = 'metrics-retired.json'
+LOCK = 'metrics.lock'
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Метрики текущего процесса."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.flushed = 0
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def _check_pid(self):
+        # После fork в дочернем процессе осталась копия родителя.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            self._check_pid()
+            self.counters[_key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        """Значение гистограммы: счётчики корзин, затем сумма."""
+        buckets = HISTOGRAMS[name][1]
+        with self.lock:
+            self._check_pid()
+            values = self.histograms.setdefault(
+                _key(name, labels), [0] * (len(buckets) + 2)
+            )
+            values[bisect_left(buckets, value)] += 1
+            values[-1] += value
+
+    @contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def path(self):
+        return os.path.join(settings.METRICS_DIR, f'metrics-{self.pid}.json')
+
+    def flush(self, force=False):
+        """Атомарно переписывает файл процесса."""
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        if not self.flushed:
+            # Файл с нашим pid остался от завершившегося процесса.
+            retire(self.path())
+        with self.lock:
+            self._check_pid()
+            self.flushed = now
+            data = {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, values]
+                    for (name, labels), values in self.histograms.items()
+                ],
+            }
+            path = self.path()
+        _write(path, data)
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush(force=True))
+
+
+def record_cache(key, hit):
+    for prefix, kind in CACHE_KINDS:
+        if key.startswith(prefix):
+            break
+    else:
+        kind = 'other'
+    registry.inc(
+        'yatube_cache_requests_total',
+        cache=kind, result='hit' if hit else 'miss'
+    )
+
+
+def _write(path, data):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file_:
+        json.dump(data, file_)
+    os.replace(tmp, path)
+
+
+def _add(counters, histograms, data):
+    for name, labels, value in data['counters']:
+        counters[name, tuple(map(tuple, labels))] += value
+    for name, labels, values in data['histograms']:
+        key = name, tuple(map(tuple, labels))
+        if key not in histograms:
+            histograms[key] = list(values)
+        else:
+            histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+
+
+def _read(paths):
+    counters, histograms = defaultdict(float), {}
+    for path in paths:
+        try:
+            with open(path) as file_:
+                _add(counters, histograms, json.load(file_))
+        except (OSError, ValueError):
+            continue
+    return counters, histograms
+
+
+@contextmanager
+def _locked(operation):
+    """Блокировка каталога метрик между процессами."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, LOCK), 'a') as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def retire(path):
+    """Прибавляет файл завершившегося процесса к retired и удаляет его."""
+    if fcntl is None or not os.path.exists(path):
+        return
+    retired = os.path.join(settings.METRICS_DIR, RETIRED)
+    with _locked(fcntl.LOCK_EX):
+        if not os.path.exists(path):
+            return
+        counters, histograms = _read([retired, path])
+        _write(retired, {
+            'counters': [
+                [name, labels, value]
+                for (name, labels), value in counters.items()
+            ],
+            'histograms': [
+                [name, labels, values]
+                for (name, labels), values in histograms.items()
+            ],
+        })
+        os.remove(path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Сумма метрик всех процессов."""
+    registry.flush(force=True)
+    pattern = os.path.join(settings.METRICS_DIR, 'metrics-*.json')
+    if fcntl is None:
+        return _read(glob.glob(pattern))
+    for path in glob.glob(pattern):
+        pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+        if pid.isdigit() and not _alive(int(pid)):
+            retire(path)
+    # Пока идёт перенос в retired, файл учитывался бы дважды.
+    with _locked(fcntl.LOCK_SH):
+        return _read(glob.glob(pattern))
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _sample(name, labels, value):
+    if labels:
+        escaped = ','.join(
+            '%s="%s"' % (
+                label,
+                str(text).replace('\\', r'\\').replace('"', r'\"')
+                .replace('\n', r'\n'),
+            )
+            for label, text in labels
+        )
+        name = f'{name}{{{escaped}}}'
+    return f'{name} {_number(value)}'
+
+
+def _hit_ratios(counters):
+    totals = defaultdict(lambda: [0, 0])
+    for (name, labels), value in counters.items():
+        if name == 'yatube_cache_requests_total':
+            labels = dict(labels)
+            totals[labels['cache']][labels['result'] == 'hit'] += value
+    return {
+        kind: hits / (misses + hits)
+        for kind, (misses, hits) in totals.items()
+        if misses + hits
+    }
+
+
+def render():
+    """Текст для /metrics."""
+    counters, histograms = collect()
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [
+            _sample(name, labels, value)
+            for (key, labels), value in sorted(counters.items())
+            if key == name
+        ]
+    lines += [
+        f'# HELP {HIT_RATIO} Доля попаданий в кэш по виду ключа.',
+        f'# TYPE {HIT_RATIO} gauge',
+    ]
+    lines += [
+        _sample(HIT_RATIO, (('cache', kind),), ratio)
+        for kind, ratio in sorted(_hit_ratios(counters).items())
+    ]
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (key, labels), values in sorted(histograms.items()):
+            if key != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append(_sample(
+                    f'{name}_bucket',
+                    (('le', _number(bound) if bound != '+Inf' else bound),
+                     *labels),
+                    cumulative,
+                ))
+            lines.append(_sample(f'{name}_sum', labels, values[-1]))
+            lines.append(_sample(f'{name}_count', labels, cumulative))
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Считает ответы view из METRICS_NAMESPACES.
+
+    Ставится первым: ответы из кэша страниц тоже учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+        # Маршрут определяет обработчик Django, а при попадании в кэш
+        # страниц — AnonymousPageCacheMiddleware.
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.namespace not in (
+            settings.METRICS_NAMESPACES
+        ):
+            return response
+        view = match.view_name
+        registry.observe(
+            'yatube_request_duration_seconds',
+            time.perf_counter() - start, view=view,
+        )
+        registry.observe('yatube_request_db_queries', queries, view=view)
+        registry.inc(
+            'yatube_requests_total', view=view, method=request.method,
+            status=str(response.status_code),
+        )
+        registry.flush()
+        return response
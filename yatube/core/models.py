@@ -0,0 +1,42 @@
+from django.db import router
+
+from . import writer
+
+
+class CountersMixin:
+    """Защищает денормализованные счётчики от перезаписи.
+
+    Счётчики меняются только атомарными UPDATE с F(), поэтому при
+    сохранении уже существующего объекта они исключаются из update_fields:
+    иначе устаревшее значение из памяти затёрло бы чужие инкременты.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class SerializedWritesMixin:
+    """Сохранение и удаление объекта через очередь записи (core.writer).
+
+    Идёт первым в базовых классах, чтобы в писателе выполнялись
+    и остальные save(), и сигналы модели.
+    """
+
+    def save(self, *args, **kwargs):
+        alias = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        return writer.write(alias, super().save, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        alias = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        return writer.write(alias, super().delete, *args, **kwargs)
@@ -0,0 +1,111 @@
+"""Поиск N+1 во время работы: повторные ленивые загрузки связей.
+
+Обращение к незагруженному ForeignKey или OneToOne (post.author без
+select_related, user.profile) делает отдельный запрос. Если одно
+и то же поле так загружается из одного места больше раза за запрос,
+это N+1. Включается настройкой NPLUSONE_DETECT для разработки
+и стенда; ленивые загрузки обратных ForeignKey (post.comments.all)
+не отслеживаются.
+"""
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor, ReverseOneToOneDescriptor,
+)
+
+from .queries import query_origin
+
+logger = logging.getLogger(__name__)
+
+_state = local()
+
+
+class NPlusOneError(Exception):
+    """Повторная ленивая загрузка при NPLUSONE_RAISE = True."""
+
+
+def _field(descriptor):
+    if isinstance(descriptor, ReverseOneToOneDescriptor):
+        related = descriptor.related
+        return related.model._meta.label, related.get_accessor_name()
+    field = descriptor.field
+    return field.model._meta.label, field.name
+
+
+def _wrap(descriptor_class):
+    original = descriptor_class.get_queryset
+    if getattr(original, 'nplusone', False):
+        return
+
+    def get_queryset(self, **hints):
+        # С instance дескриптор вызывается только при ленивой загрузке,
+        # prefetch_related обходится без него.
+        loads = getattr(_state, 'loads', None)
+        if loads is not None and 'instance' in hints:
+            loads[(*_field(self), query_origin())] += 1
+        return original(self, **hints)
+
+    get_queryset.nplusone = True
+    descriptor_class.get_queryset = get_queryset
+
+
+def install():
+    """Подключает учёт к дескрипторам связей; повторный вызов ничего
+    не делает. ForwardOneToOneDescriptor наследует обёртку."""
+    _wrap(ForwardManyToOneDescriptor)
+    _wrap(ReverseOneToOneDescriptor)
+
+
+@contextmanager
+def collect():
+    """Счётчик ленивых загрузок блока: (модель, поле, место) -> раз."""
+    previous = getattr(_state, 'loads', None)
+    loads = _state.loads = Counter()
+    try:
+        yield loads
+    finally:
+        _state.loads = previous
+
+
+def problems(loads):
+    return [
+        (model, field, origin, count)
+        for (model, field, origin), count in loads.most_common()
+        if count >= settings.NPLUSONE_THRESHOLD
+    ]
+
+
+def report(found):
+    return '\n'.join(
+        f'{model}.{field}: {count} раз, {origin or "?"}'
+        for model, field, origin, count in found
+    )
+
+
+class NPlusOneMiddleware:
+    """Пишет найденные N+1 в журнал, при NPLUSONE_RAISE — падает.
+
+    Стоит перед HolePunchMiddleware, чтобы учитывать и дыры.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECT:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect() as loads:
+            response = self.get_response(request)
+        found = problems(loads)
+        if found:
+            text = f'N+1 в {request.path}:\n{report(found)}'
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneError(text)
+            logger.warning(text)
+        return response
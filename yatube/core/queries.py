@@ -0,0 +1,84 @@
+"""Запись SQL-запросов вместе с местом, откуда они выполнены."""
+import os
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+TESTS_DIR = os.sep + 'tests' + os.sep
+
+
+def _template_line(frame):
+    if frame.f_code.co_name != 'render_annotated':
+        return None
+    node = frame.f_locals.get('self')
+    if not isinstance(node, Node) or getattr(node, 'token', None) is None:
+        return None
+    origin = getattr(node, 'origin', None)
+    name = getattr(origin, 'template_name', None) or getattr(
+        origin, 'name', '?'
+    )
+    return f'{name}:{node.token.lineno}'
+
+
+def _code_line(frame):
+    filename = frame.f_code.co_filename
+    if (
+        not filename.startswith(settings.BASE_DIR)
+        or TESTS_DIR in filename
+        or filename == __file__
+    ):
+        return None
+    path = os.path.relpath(filename, settings.BASE_DIR)
+    return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+
+
+def query_origin():
+    """Строка шаблона и строка кода проекта, ближайшие к запросу.
+
+    Например «posts/includes/post.html:12 (core/thumbnails.py:125 in
+    lookup)»; None, если запрос выполнен целиком из кода Django.
+    """
+    frame = sys._getframe(1)
+    template = code = None
+    while frame is not None and template is None:
+        template = _template_line(frame)
+        if code is None:
+            code = _code_line(frame)
+        frame = frame.f_back
+    if template and code:
+        return f'{template} ({code})'
+    return template or code
+
+
+class QueryLog:
+    """Контекстный менеджер: запросы блока как пары (sql, origin)."""
+
+    def __init__(self, using='default'):
+        self.connection = connections[using]
+        self.queries = []
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, query_origin()))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def origins(self):
+        return Counter(origin for _, origin in self.queries)
+
+    def report(self):
+        return '\n'.join(
+            f'  {origin or "?"}: {sql}' for sql, origin in self.queries
+        )
@@ -0,0 +1,156 @@
+"""Воспроизведение трафика против запущенного сайта.
+
+Здесь нет обращений к Django: рабочие процессы только шлют HTTP,
+поэтому замеряется развёртывание целиком — сервер, воркеры, база.
+"""
+import re
+import time
+import zlib
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from .stats import percentile
+
+# Common и combined log format (nginx, Apache, gunicorn).
+LOG_LINE = re.compile(
+    r'(?P<host>\S+) \S+ (?P<user>\S+) \[[^\]]*\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" \d{3}'
+    r'(?: \S+(?: "[^"]*" "(?P<agent>[^"]*)")?)?'
+)
+LOGIN_PATH = '/auth/login/'
+POST_TEXT = 'Воспроизведённый запрос'
+
+
+def parse_log(lines):
+    """Запросы журнала: словари client, user, method, path.
+
+    Клиент — пользователь HTTP-аутентификации или пара адрес
+    и User-Agent; строки другого формата пропускаются.
+    """
+    for line in lines:
+        match = LOG_LINE.match(line)
+        if match is None:
+            continue
+        user = match.group('user')
+        user = None if user == '-' else user
+        yield {
+            'client': user or f'{match.group("host")} {match.group("agent")}',
+            'user': user,
+            'method': match.group('method'),
+            'path': match.group('path'),
+        }
+
+
+def split(entries, workers):
+    """Раскладывает запросы по процессам; клиент целиком в одном."""
+    shares = [[] for _ in range(workers)]
+    for entry in entries:
+        shares[zlib.crc32(entry['client'].encode()) % workers].append(entry)
+    return shares
+
+
+def failed(response):
+    """Ошибка: нет ответа, ответ 4xx/5xx или переадресация на вход.
+
+    Переадресация на вход — отказ login_required: страница не отдана,
+    а дешёвый ответ завысил бы пропускную способность.
+    """
+    if response is None or response.status_code >= 400:
+        return True
+    location = response.headers.get('Location')
+    return response.is_redirect and location is not None and (
+        urlsplit(location).path == LOGIN_PATH
+    )
+
+
+class Client:
+    """Сессия одного пользователя: куки, вход, CSRF-токен."""
+
+    def __init__(self, base_url, user, password, timeout, records):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.records = records
+        if user is not None:
+            self.login(user, password)
+
+    def send(self, view, method, path, data=None, record=True):
+        """Запрос; записывается его view, ошибка и длительность.
+
+        Вход и получение CSRF-токена (record=False) в замеры не идут:
+        это подготовка сессии, а не воспроизводимый трафик.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, urljoin(self.base_url, path), data=data,
+                headers={'Referer': self.base_url},
+                timeout=self.timeout, allow_redirects=False,
+            )
+        except requests.RequestException:
+            response = None
+        latency = time.perf_counter() - start
+        if record:
+            self.records.append((view, failed(response), latency))
+        return response
+
+    def csrf_token(self):
+        if 'csrftoken' not in self.session.cookies:
+            self.send('users:login', 'GET', LOGIN_PATH, record=False)
+        return self.session.cookies.get('csrftoken', '')
+
+    def login(self, user, password):
+        self.send('users:login', 'POST', LOGIN_PATH, {
+            'username': user,
+            'password': password,
+            'csrfmiddlewaretoken': self.csrf_token(),
+        }, record=False)
+
+    def replay(self, entry):
+        data = None
+        if entry['method'] == 'POST':
+            # В журнале нет тел запросов: формы получают текст-заглушку.
+            data = {
+                'text': POST_TEXT, 'csrfmiddlewaretoken': self.csrf_token()
+            }
+        self.send(entry['view'], entry['method'], entry['path'], data)
+
+
+def run_worker(base_url, entries, password, timeout):
+    """Запросы одного процесса в исходном порядке: [(view, ошибка, s)]."""
+    records, clients = [], {}
+    for entry in entries:
+        client = clients.get(entry['client'])
+        if client is None:
+            client = clients[entry['client']] = Client(
+                base_url, entry['user'], password, timeout, records
+            )
+        client.replay(entry)
+    return records
+
+
+def summarize(records, elapsed):
+    """Пропускная способность, процентили и доля ошибок по view.
+
+    Без записей итогов нет: возвращается пустой словарь.
+    """
+    views = defaultdict(list)
+    for view, error, latency in records:
+        views[view].append((error, latency))
+    if records:
+        views['*'] = [(error, latency) for _, error, latency in records]
+    summary = {}
+    for view, results in sorted(views.items()):
+        latencies = [latency for _, latency in results]
+        errors = sum(1 for error, _ in results if error)
+        summary[view] = {
+            'requests': len(results),
+            'rps': round(len(results) / elapsed, 1) if elapsed else 0,
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            'error_rate': round(errors / len(results), 4),
+        }
+    return summary
@@ -0,0 +1,127 @@
+"""Журнал медленных SQL-запросов с планом EXPLAIN QUERY PLAN.
+
+Одинаковые запросы (с точностью до параметров и длины списков IN)
+пишутся не чаще раза в SLOW_QUERY_LOG_INTERVAL секунд; пропущенные
+повторы учитываются в следующей записи. Сводку по журналу выводит
+команда slow_queries.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+SPACES = re.compile(r'\s+')
+PARAM_LIMIT = 200
+# Предел числа разных запросов в памяти ограничителя.
+MAX_FINGERPRINTS = 1000
+
+_seen = {}
+_lock = Lock()
+
+
+def fingerprint(sql):
+    normalized = SPACES.sub(' ', IN_LIST.sub('(...)', sql)).strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:12]
+
+
+def _param(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    if len(text) > PARAM_LIMIT:
+        text = text[:PARAM_LIMIT] + '…'
+    return text
+
+
+def query_plan(connection, sql, params):
+    """Строки EXPLAIN QUERY PLAN или None для прочих запросов и СУБД.
+
+    Курсор берётся в обход обёрток execute_wrapper, чтобы сам план
+    не попадал ни в журнал, ни в замеры.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return None
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+
+
+def _admit(key, duration):
+    """Пора ли писать запрос; иначе повтор копится в счётчиках."""
+    now = time.monotonic()
+    with _lock:
+        entry = _seen.get(key)
+        if (
+            entry is not None
+            and now - entry['logged'] < settings.SLOW_QUERY_LOG_INTERVAL
+        ):
+            entry['suppressed'] += 1
+            entry['suppressed_ms'] += duration * 1000
+            return None
+        if len(_seen) >= MAX_FINGERPRINTS:
+            _seen.clear()
+        _seen[key] = {'logged': now, 'suppressed': 0, 'suppressed_ms': 0}
+        return entry or {'suppressed': 0, 'suppressed_ms': 0}
+
+
+def record(request, connection, sql, params, many, duration):
+    key = fingerprint(sql)
+    previous = _admit(key, duration)
+    if previous is None:
+        return
+    match = getattr(request, 'resolver_match', None)
+    logger.warning(json.dumps({
+        'time': round(time.time(), 3),
+        'fingerprint': key,
+        'view': match.view_name if match else None,
+        'path': request.path,
+        'duration_ms': round(duration * 1000, 1),
+        'sql': sql,
+        'params': None if many else [_param(value) for value in params or ()],
+        'plan': None if many else query_plan(connection, sql, params),
+        'suppressed': previous['suppressed'],
+        'suppressed_ms': round(previous['suppressed_ms'], 1),
+    }, ensure_ascii=False))
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал запросы дольше SLOW_QUERY_THRESHOLD секунд."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    self.wrapper(request, connection)
+                ))
+            return self.get_response(request)
+
+    @staticmethod
+    def wrapper(request, connection):
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                if duration >= settings.SLOW_QUERY_THRESHOLD:
+                    record(request, connection, sql, params, many, duration)
+        return execute
@@ -0,0 +1,38 @@
+"""Настройка соединений SQLite прагмами из SQLITE_PRAGMAS."""
+import re
+
+from django.conf import settings
+
+PRAGMA_VALUE = re.compile(r'-?\w+')
+# Их команда sqlite_status выводит вместе с SQLITE_PRAGMAS.
+DIAGNOSTIC_PRAGMAS = (
+    'page_size', 'page_count', 'freelist_count', 'wal_autocheckpoint',
+    'journal_size_limit',
+)
+
+
+def pragma(raw, name, value=None):
+    """Значение прагмы; с value она сначала устанавливается.
+
+    raw — соединение sqlite3: запросы идут мимо обёрток execute
+    и не попадают в счётчики запросов страниц.
+    """
+    if value is not None:
+        if not PRAGMA_VALUE.fullmatch(str(value)):
+            raise ValueError(f'Недопустимое значение прагмы {name}: {value}')
+        raw.execute(f'PRAGMA {name} = {value}').fetchall()
+    row = raw.execute(f'PRAGMA {name}').fetchone()
+    return row[0] if row else None
+
+
+def configure(sender, connection, **kwargs):
+    """Прагмы каждого нового соединения SQLite.
+
+    journal_mode идёт первым: WAL хранится в файле базы, остальные
+    прагмы действуют только на соединение. У базы в памяти (в тестах)
+    журнал остаётся memory.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        pragma(connection.connection, name, value)
@@ -0,0 +1,8 @@
+"""Статистика замеров для команд benchmark и replay."""
+import math
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу; значений должно быть хотя бы одно."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag
+def hole(name, *args):
+    """Место для персонального куска страницы, см. core.holes."""
+    return mark_safe(holes.placeholder(name, *args))
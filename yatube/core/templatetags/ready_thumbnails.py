@@ -0,0 +1,15 @@
+from django import template
+
+from core import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def ready_thumbnail(context, file_, preset):
+    """Готовая миниатюра или None, пока фоновый пул её не создал.
+
+    Если view положила в контекст thumbnail_batch, миниатюры всей
+    страницы читаются из kvstore одним запросом.
+    """
+    return thumbnails.lookup(file_, preset, context.get('thumbnail_batch'))
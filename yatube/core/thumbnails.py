@@ -0,0 +1,218 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .metrics import registry
+from .timing import timed
+
+logger = logging.getLogger(__name__)
+
+FAILED_KEY = 'thumbnails:failed:{}:{}'
+
+# Отправляется из фонового потока, когда миниатюра файла поля готова.
+thumbnail_ready = Signal(providing_args=['instance', 'preset'])
+
+_executor = None
+_pending = set()
+_lock = Lock()
+
+
+def _options(source, preset):
+    """Опции миниатюры так же, как их дополняет sorl-thumbnail.
+
+    От опций зависит имя файла миниатюры, поэтому без совпадения
+    с ThumbnailBackend.get_thumbnail готовую миниатюру не найти.
+    """
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    options = dict(options)
+    backend = default.backend
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return geometry, options
+
+
+def thumbnail_file(file_, preset):
+    """ImageFile миниатюры пресета, без обращения к хранилищу."""
+    source = ImageFile(file_)
+    geometry, options = _options(source, preset)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def _get_many_raw(keys):
+    """Значения kvstore по списку ключей: один get_many и один SELECT."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        return {key: kvstore._get_raw(key) for key in keys}
+    found = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        rows = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        # Как и sorl, кэшируем промахи, чтобы не ходить в БД повторно.
+        loaded = {key: rows.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            loaded, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        found.update(loaded)
+    return {
+        key: None if value == EMPTY_VALUE else value
+        for key, value in found.items()
+    }
+
+
+class ThumbnailBatch:
+    """Миниатюры страницы, которые загружаются разом при первом обращении.
+
+    pairs — функция, возвращающая пары (файл, пресет). Она вызывается
+    только при первом обращении к миниатюре: если страница отдана из кэша
+    фрагментов, ни лента, ни kvstore не читаются.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.loaded = False
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        pairs = [(file_, preset) for file_, preset in self.pairs() if file_]
+        keys = [
+            add_prefix(thumbnail_file(file_, preset).key)
+            for file_, preset in pairs
+        ]
+        values = _get_many_raw(keys)
+        for (file_, preset), key in zip(pairs, keys):
+            value = values.get(key)
+            ready = getattr(file_, '_ready_thumbnails', {})
+            ready[preset] = deserialize_image_file(value) if value else None
+            file_._ready_thumbnails = ready
+
+
+def lookup(file_, preset, batch=None):
+    """Готовая миниатюра или None; отсутствующая ставится в очередь."""
+    if not file_:
+        return None
+    with timed('thumbnail_time'):
+        if batch is not None:
+            batch.load()
+        ready = getattr(file_, '_ready_thumbnails', {})
+        if preset in ready:
+            cached = ready[preset]
+        else:
+            cached = default.kvstore.get(thumbnail_file(file_, preset))
+        if cached is None:
+            schedule(file_, preset)
+    return cached
+
+
+def _executor_instance():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def stored_size(file_):
+    """Размеры картинки, записанные в модель при загрузке, или None."""
+    instance = getattr(file_, 'instance', None)
+    field = getattr(file_, 'field', None)
+    if instance is None or field is None:
+        return None
+    width = getattr(instance, f'{field.name}_width', None)
+    height = getattr(instance, f'{field.name}_height', None)
+    return (width, height) if width and height else None
+
+
+def _generate(name, preset, instance, size=None):
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    if size is not None:
+        # Исходник с размерами из модели: если миниатюра уже есть,
+        # sorl не откроет оригинал только ради его размеров.
+        source = ImageFile(name)
+        source.set_size(size)
+        default.kvstore.get_or_set(source)
+    try:
+        # В запросе время учитывается только при THUMBNAIL_WORKERS = 0.
+        with timed('thumbnail_time'), registry.time(
+            'yatube_image_processing_seconds', operation='thumbnail'
+        ):
+            thumbnail = get_thumbnail(name, geometry, **options)
+        if default.kvstore.get(thumbnail) is None:
+            # sorl не сохраняет миниатюры битых исходников.
+            cache.set(FAILED_KEY.format(name, preset), True,
+                      settings.THUMBNAIL_RETRY_TIMEOUT)
+        elif instance is not None:
+            thumbnail_ready.send(
+                sender=type(instance), instance=instance, preset=preset
+            )
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s (%s)', name, preset)
+        cache.set(FAILED_KEY.format(name, preset), True,
+                  settings.THUMBNAIL_RETRY_TIMEOUT)
+    finally:
+        with _lock:
+            _pending.discard((name, preset))
+        close_old_connections()
+
+
+def _submit(name, preset, instance, size):
+    with _lock:
+        if (name, preset) in _pending:
+            return
+        _pending.add((name, preset))
+    if not settings.THUMBNAIL_WORKERS:
+        _generate(name, preset, instance, size)
+        return
+    _executor_instance().submit(_generate, name, preset, instance, size)
+
+
+def schedule(file_, preset):
+    """Ставит создание миниатюры в фоновый пул после фиксации транзакции.
+
+    Каждая пара (файл, пресет) обрабатывается пулом не более одного раза
+    одновременно, а неудачные попытки повторяются не чаще, чем раз
+    в THUMBNAIL_RETRY_TIMEOUT секунд.
+    """
+    name = file_.name
+    instance = getattr(file_, 'instance', None)
+    size = stored_size(file_)
+    if cache.get(FAILED_KEY.format(name, preset)):
+        return
+    transaction.on_commit(lambda: _submit(name, preset, instance, size))
+
+
+def pregenerate(file_, *presets):
+    """Готовит миниатюры только что загруженного файла."""
+    if not file_:
+        return
+    for preset in presets:
+        cache.delete(FAILED_KEY.format(file_.name, preset))
+        schedule(file_, preset)
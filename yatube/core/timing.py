@@ -0,0 +1,193 @@
+"""Замеры запроса для заголовка Server-Timing и журнала.
+
+Замеряется только доля запросов SERVER_TIMING_SAMPLE_RATE; для
+остальных все хуки сводятся к проверке current() is None.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from threading import local
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as BaseTemplate
+from django.template.backends.django import reraise
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_state = local()
+_missing = object()
+
+
+class Timings:
+    """Счётчики одного запроса; время в секундах."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.thumbnail_time = 0.0
+        self._active = set()
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def header(self, total):
+        return ', '.join((
+            'db;dur=%.1f;desc="%d queries"' % (
+                self.db_time * 1000, self.db_queries
+            ),
+            'tpl;dur=%.1f' % (self.template_time * 1000),
+            'cache;desc="hit=%d miss=%d"' % (
+                self.cache_hits, self.cache_misses
+            ),
+            'thumb;dur=%.1f' % (self.thumbnail_time * 1000),
+            'total;dur=%.1f' % (total * 1000),
+        ))
+
+    def as_dict(self, request, response, total):
+        match = request.resolver_match
+        return {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'thumbnail_ms': round(self.thumbnail_time * 1000, 1),
+        }
+
+
+def current():
+    """Счётчики текущего запроса или None, если он не замеряется."""
+    return getattr(_state, 'timings', None)
+
+
+@contextmanager
+def timed(metric):
+    """Добавляет время блока к метрике; вложенные блоки не суммируются."""
+    timings = current()
+    if timings is None or metric in timings._active:
+        yield
+        return
+    timings._active.add(metric)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(metric)
+        setattr(
+            timings, metric,
+            getattr(timings, metric) + time.perf_counter() - start
+        )
+
+
+class ServerTimingMiddleware:
+    """Ставится первым, чтобы учесть и ответы из кэша страниц."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings = _state.timings = Timings()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _state.timings = None
+        total = time.perf_counter() - start
+        response['Server-Timing'] = timings.header(total)
+        logger.info(json.dumps(timings.as_dict(request, response, total)))
+        return response
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        with timed('template_time'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который замеряет время рендеринга."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _record_cache(key, hit):
+    metrics.record_cache(key, hit)
+    timings = current()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+
+
+class TimedCache:
+    """Обёртка бэкенда кэша из TIMED_BACKEND, которая считает
+    попадания и промахи для замеров запроса и метрик.
+
+    Остальные методы и атрибуты — бэкенда как есть, поэтому
+    под обёрткой может стоять любой кэш: LocMemCache, Memcached, Redis.
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        self.backend = import_string(params.pop('TIMED_BACKEND'))(
+            location, params
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def __contains__(self, key):
+        return key in self.backend
+
+    def get(self, key, default=None, version=None):
+        value = self.backend.get(key, _missing, version)
+        _record_cache(key, value is not _missing)
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = self.backend.get_many(keys, version)
+        for key in keys:
+            _record_cache(key, key in values)
+        return values
+
+    # Через get и add обёртки, чтобы чтение тоже учитывалось.
+    get_or_set = BaseCache.get_or_set
@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics as metrics_registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +17,22 @@ def csrf_failure(request, reason=''):
 
 def internal_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def metrics(request):
+    """Метрики всех процессов для Prometheus.
+
+    Нужен заголовок Authorization: Bearer METRICS_TOKEN; адресу
+    клиента не доверяем: за прокси все запросы идут с 127.0.0.1.
+    Без METRICS_TOKEN эндпоинт выключен.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(
+        header.encode(), f'Bearer {token}'.encode()
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,127 @@
+"""Очередь записи: один поток-писатель на базу (WRITE_QUEUE).
+
+SQLite допускает одного писателя, и при WAL одновременные записи
+потоков запросов ждут друг друга в busy_timeout. С очередью потоки
+запросов отдают записи писателю и ждут результат: он собирает
+несколько записей в одну транзакцию (групповая фиксация), а каждую
+выполняет в своей точке сохранения, так что ошибка одной откатывает
+только её и достаётся вызвавшему запросу.
+
+Писатель свой у каждого процесса: воркеры WSGI-сервера по-прежнему
+пишут параллельно, очередь убирает конкуренцию потоков внутри
+процесса. Запросы писателя не попадают в замеры запроса
+(Server-Timing, /metrics) — они выполняются в другом потоке.
+"""
+import logging
+import os
+import queue
+from concurrent.futures import Future, TimeoutError
+from threading import Lock, Thread, current_thread
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, close_old_connections, connections, transaction,
+)
+
+logger = logging.getLogger(__name__)
+
+_writers = {}
+_lock = Lock()
+
+
+class WriteTimeout(Exception):
+    """Запись не дождалась очереди за WRITE_QUEUE_TIMEOUT секунд."""
+
+
+class Writer:
+    """Поток, выполняющий записи одной базы пакетами."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.jobs = queue.Queue()
+        self.thread = Thread(
+            target=self.loop, name=f'writer-{alias}', daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, func, args, kwargs):
+        future = Future()
+        self.jobs.put((future, func, args, kwargs))
+        return future
+
+    def batch(self):
+        """Первая запись и те, что успели прийти за WRITE_QUEUE_WAIT."""
+        jobs = [self.jobs.get()]
+        while len(jobs) < settings.WRITE_QUEUE_BATCH:
+            try:
+                jobs.append(self.jobs.get(timeout=settings.WRITE_QUEUE_WAIT))
+            except queue.Empty:
+                break
+        # Отменённые вызывающим (по таймауту) записи не выполняются.
+        return [job for job in jobs if job[0].set_running_or_notify_cancel()]
+
+    def run(self, jobs):
+        results = []
+        with transaction.atomic(using=self.alias):
+            for future, func, args, kwargs in jobs:
+                try:
+                    with transaction.atomic(using=self.alias):
+                        results.append((future, func(*args, **kwargs), None))
+                except Exception as error:
+                    results.append((future, None, error))
+        # Результаты отдаются только после фиксации всего пакета.
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def loop(self):
+        while True:
+            jobs = self.batch()
+            if not jobs:
+                continue
+            try:
+                self.run(jobs)
+            except Exception as error:
+                logger.exception('Не удалось зафиксировать пакет записей')
+                for future, *_ in jobs:
+                    if not future.done():
+                        future.set_exception(error)
+            finally:
+                close_old_connections()
+
+
+def writer(alias):
+    """Писатель базы alias; после fork создаётся заново."""
+    with _lock:
+        current = _writers.get(alias)
+        if current is None or current[0] != os.getpid():
+            current = _writers[alias] = (os.getpid(), Writer(alias))
+        return current[1]
+
+
+def write(alias, func, *args, **kwargs):
+    """Выполняет func в потоке-писателе базы alias и возвращает результат.
+
+    Без WRITE_QUEUE, в самом писателе и внутри открытой транзакции
+    (её записи писатель бы не увидел) func вызывается на месте.
+    Исключение func поднимается здесь же.
+    """
+    if (not settings.WRITE_QUEUE
+            or connections[alias].in_atomic_block
+            or current_thread().name == f'writer-{alias}'):
+        return func(*args, **kwargs)
+    future = writer(alias).submit(func, args, kwargs)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            raise WriteTimeout(f'Очередь записи {alias} не успела')
+        # Запись уже выполняется: её результат нужно дождаться.
+        return future.result()
+
+
+def run(func, *args, **kwargs):
+    """write() для базы по умолчанию."""
+    return write(DEFAULT_DB_ALIAS, func, *args, **kwargs)
@@ -1,10 +1,24 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
+class SearchIndexMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE."""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=search.matching_ids(search_term, self.search_kind)
+        ), False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(SearchIndexMixin, admin.ModelAdmin):
+    search_kind = search.POST
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
@@ -13,8 +27,10 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SearchIndexMixin, admin.ModelAdmin):
+    search_kind = search.COMMENT
     list_display = ('pk', 'post', 'author', 'text', 'created')
+    search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     name = 'posts'
     verbose_name = 'Управление постами'
+
+    def ready(self):
+        from . import checks, holes, signals  # noqa: F401
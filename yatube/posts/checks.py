@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from . import fragments
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache(app_configs, **kwargs):
+    """Поколения фрагментов должны быть общими для воркеров."""
+    if not fragments.process_local():
+        return []
+    return [Warning(
+        'Кэш по умолчанию свой у каждого процесса: изменения видны '
+        'другим воркерам только через FRAGMENT_LOCAL_TIMEOUT '
+        f'({settings.FRAGMENT_LOCAL_TIMEOUT} с).',
+        hint=(
+            'Настройте общий кэш (Memcached, Redis) в TIMED_BACKEND '
+            'кэша default.'
+        ),
+        id='posts.W001',
+    )]
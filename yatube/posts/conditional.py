@@ -0,0 +1,90 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from . import fragments
+
+
+def page_validators(request, scopes):
+    """ETag и Last-Modified страницы по областям кэша фрагментов.
+
+    Валидаторы читаются из кэша и не требуют запросов к ленте. В ETag
+    входят адрес с параметрами листания и пользователь: от него зависят
+    шапка и кнопки управления. У вошедших в него входят ещё сессия
+    и CSRF-токен, а Last-Modified не отдаётся: после нового входа
+    304 вернул бы страницу с формами на устаревшем токене.
+    """
+    parts = [
+        request.get_full_path(),
+        settings.POSTS_PAGINATION,
+        str(request.user.pk or 0),
+        *(str(fragments.generation(scope)) for scope in scopes),
+    ]
+    authenticated = request.user.is_authenticated
+    if authenticated:
+        parts += [
+            request.session.session_key or '',
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ]
+    etag = quote_etag(hashlib.md5(':'.join(parts).encode()).hexdigest())
+    changed = max(fragments.changed_at(scope) for scope in scopes)
+    if authenticated or time.time() - changed < 1:
+        # Last-Modified точен до секунды: изменения в ту же секунду
+        # были бы не видны клиенту, который шлёт только If-Modified-Since.
+        return etag, None
+    return etag, int(changed)
+
+
+def set_cache_policy(request, response, public_max_age):
+    """Cache-Control: public для гостей, private для вошедших."""
+    if request.user.is_authenticated:
+        patch_cache_control(
+            response, private=True, max_age=0, must_revalidate=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=public_max_age,
+            must_revalidate=True,
+        )
+    patch_vary_headers(response, ('Cookie',))
+
+
+def conditional_page(scopes, public_max_age=0):
+    """Условный GET для HTML-страниц.
+
+    scopes(**kwargs) возвращает области кэша фрагментов, от которых
+    зависит страница, или None, если объекта нет. Если клиент прислал
+    совпадающий валидатор, view не вызывается и отдаётся 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            view_scopes = None
+            if request.method in ('GET', 'HEAD'):
+                view_scopes = scopes(**kwargs)
+            etag = last_modified = None
+            response = None
+            if view_scopes is not None:
+                etag, last_modified = page_validators(request, view_scopes)
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                )
+            if response is None:
+                response = view(request, **kwargs)
+            if response.status_code in (200, 304):
+                if etag:
+                    response.setdefault('ETag', etag)
+                if last_modified:
+                    response.setdefault(
+                        'Last-Modified', http_date(last_modified)
+                    )
+                set_cache_policy(request, response, public_max_age)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,39 @@
+from django.db.models import F
+
+from users.models import Profile
+
+from .models import Group, Post
+
+
+def _change(queryset, field, delta):
+    """Атомарно меняет счётчик; ниже нуля он не опускается."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def post_added(post, delta=1):
+    _change(Profile.objects.filter(user_id=post.author_id), 'posts_count',
+            delta)
+    if post.group_id is not None:
+        group_moved(None, post.group_id, delta)
+
+
+def group_moved(old_group_id, new_group_id, delta=1):
+    if old_group_id is not None:
+        _change(Group.objects.filter(pk=old_group_id), 'posts_count', -delta)
+    if new_group_id is not None:
+        _change(Group.objects.filter(pk=new_group_id), 'posts_count', delta)
+
+
+def comment_added(comment, delta=1):
+    if comment.post_id is not None:
+        _change(Post.objects.filter(pk=comment.post_id), 'comments_count',
+                delta)
+
+
+def follow_added(follow, delta=1):
+    _change(Profile.objects.filter(user_id=follow.author_id),
+            'followers_count', delta)
+    _change(Profile.objects.filter(user_id=follow.user_id),
+            'following_count', delta)
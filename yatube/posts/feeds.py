@@ -0,0 +1,154 @@
+import base64
+import binascii
+import heapq
+import json
+import zlib
+from math import ceil
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+
+
+def _sort_key(post):
+    return post.pub_date, post.pk
+
+
+def _after(value, pk):
+    return Q(pub_date__lt=value) | Q(pub_date=value, pk__lt=pk)
+
+
+def encode_positions(positions):
+    """Упаковывает позиции по авторам {author_id: (pub_date, pk)}."""
+    raw = json.dumps({
+        author_id: [value.isoformat(), pk]
+        for author_id, (value, pk) in positions.items()
+    }, separators=(',', ':'))
+    packed = zlib.compress(raw.encode())
+    return base64.urlsafe_b64encode(packed).decode().rstrip('=')
+
+
+def decode_positions(cursor):
+    """Распаковывает позиции по авторам; битый курсор даёт None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = zlib.decompress(base64.urlsafe_b64decode(padded.encode()))
+        data = json.loads(raw.decode())
+        positions = {
+            int(author_id): (parse_datetime(value), int(pk))
+            for author_id, (value, pk) in data.items()
+        }
+    except (binascii.Error, zlib.error, UnicodeDecodeError,
+            ValueError, TypeError, AttributeError):
+        return None
+    if any(value is None for value, _ in positions.values()):
+        return None
+    return positions
+
+
+class HeapMergePaginator(Paginator):
+    """Лента подписок как k-way слияние курсоров по авторам.
+
+    Для каждого автора читается упорядоченный хвост его постов по индексу
+    (author, -pub_date), а heapq.merge сливает хвосты, пока не наберётся
+    страница. В курсор страницы попадают позиции всех авторов, поэтому
+    следующая страница продолжает каждый поток с того же места.
+    """
+    cursor_mode = True
+
+    def __init__(self, author_ids, per_page):
+        super().__init__(Post.objects.none(), per_page)
+        self.author_ids = list(author_ids)
+        self.continued = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def _heads(self, positions, limit):
+        """Читает первые limit постов каждого автора пачками запросов.
+
+        У каждого автора свой подзапрос с LIMIT по индексу
+        (author, -pub_date, -id), подзапросы пачки склеены UNION ALL:
+        читается не больше limit строк на автора, а не все его посты.
+        """
+        heads = {author_id: [] for author_id in self.author_ids}
+        batch_size = settings.HEAP_FEED_AUTHORS_PER_QUERY
+        for start in range(0, len(self.author_ids), batch_size):
+            parts, params = [], []
+            for author_id in self.author_ids[start:start + batch_size]:
+                posts = Post.objects.filter(author_id=author_id)
+                if author_id in positions:
+                    posts = posts.filter(_after(*positions[author_id]))
+                sql, part_params = posts.order_by('-pub_date', '-pk').values(
+                    'pk', 'author_id', 'pub_date'
+                )[:limit].query.sql_with_params()
+                # В SQLite LIMIT части составного запроса — только
+                # во вложенном SELECT.
+                parts.append(f'SELECT * FROM ({sql})')
+                params.extend(part_params)
+            for post in Post.objects.raw(' UNION ALL '.join(parts), params):
+                heads[post.author_id].append(post)
+        for posts in heads.values():
+            posts.sort(key=_sort_key, reverse=True)
+        return heads
+
+    def _stream(self, author_id, head, limit):
+        """Ленивый курсор по постам одного автора."""
+        chunk = head
+        while chunk:
+            yield from chunk
+            if len(chunk) < limit:
+                return
+            last = chunk[-1]
+            limit *= 2
+            chunk = list(
+                Post.objects.filter(author_id=author_id)
+                .filter(_after(last.pub_date, last.pk))
+                .order_by('-pub_date', '-pk')
+                .only('pk', 'author_id', 'pub_date')[:limit]
+            )
+
+    def page(self, cursor=None):
+        """Возвращает страницу, продолжающую позиции из курсора."""
+        positions = decode_positions(cursor)
+        self.continued = positions is not None
+        positions = positions or {}
+        wanted = self.per_page + 1
+        limit = max(1, ceil(wanted / max(len(self.author_ids), 1)))
+        heads = self._heads(positions, limit)
+        merged = heapq.merge(
+            *(
+                self._stream(author_id, head, limit)
+                for author_id, head in heads.items()
+            ),
+            key=_sort_key,
+            reverse=True,
+        )
+        rows = []
+        for post in merged:
+            rows.append(post)
+            if len(rows) == wanted:
+                break
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if has_next:
+            for post in rows:
+                positions[post.author_id] = (post.pub_date, post.pk)
+            self.next_cursor = encode_positions({
+                author_id: position
+                for author_id, position in positions.items()
+                if author_id in heads
+            })
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post.pk for post in rows]
+        )
+        return self._get_page(
+            [posts[post.pk] for post in rows if post.pk in posts], 1, self
+        )
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
@@ -1,9 +1,11 @@
 from django import forms
 
+from core.images import UploadLimitFormMixin, clean_image_field
+
 from .models import Comment, Post
 
 
-class PostForm(forms.ModelForm):
+class PostForm(UploadLimitFormMixin, forms.ModelForm):
     '''Форма для создания поста.'''
     class Meta:
         model = Post
@@ -14,6 +16,9 @@ class PostForm(forms.ModelForm):
             })
         }
 
+    def clean_image(self):
+        return clean_image_field(self, 'image')
+
 
 class CommentForm(forms.ModelForm):
     '''Форма для создания комментария.'''
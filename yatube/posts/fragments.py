@@ -0,0 +1,98 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+GENERATION_KEY = 'fragments:generation:{}'
+CHANGED_KEY = 'fragments:changed:{}'
+
+
+def process_local():
+    """Кэш свой у каждого процесса: bump() не дойдёт до других воркеров."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    # За обёрткой core.timing.TimedCache — настроенный бэкенд.
+    return isinstance(getattr(backend, 'backend', backend), LocMemCache)
+
+
+def generation_timeout():
+    """Срок жизни поколений и отметок изменений.
+
+    В общем кэше они вечные. В кэше процесса истекают через
+    FRAGMENT_LOCAL_TIMEOUT: новое поколение сбрасывает фрагменты,
+    ETag и кэш страниц, которые устарели из-за правок в другом
+    процессе.
+    """
+    return settings.FRAGMENT_LOCAL_TIMEOUT if process_local() else None
+
+
+def fragment_timeout():
+    if process_local():
+        return min(
+            settings.FRAGMENT_CACHE_TIMEOUT, settings.FRAGMENT_LOCAL_TIMEOUT
+        )
+    return settings.FRAGMENT_CACHE_TIMEOUT
+
+
+def _initial_generation():
+    # Начальное значение от времени: если счётчик вытеснят из кэша,
+    # новая нумерация не совпадёт со старыми фрагментами.
+    return time.time_ns()
+
+
+def generation(scope):
+    """Текущее поколение фрагментов области (index, group:1, author:2...)."""
+    key = GENERATION_KEY.format(scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial_generation(), generation_timeout())
+        value = cache.get(key)
+    return value
+
+
+def generations(scopes):
+    """Поколения нескольких областей за одно обращение к кэшу."""
+    keys = {GENERATION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    return {
+        scope: found[key] if key in found else generation(scope)
+        for key, scope in keys.items()
+    }
+
+
+def changed_at(scope):
+    """Время последнего изменения области (Unix time).
+
+    Если отметки нет в кэше, изменение считается только что
+    произошедшим: так клиент не получит устаревшую страницу.
+    """
+    key = CHANGED_KEY.format(scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time(), generation_timeout())
+        value = cache.get(key)
+    return value
+
+
+def bump(*scopes):
+    """Сбрасывает кэш фрагментов указанных областей."""
+    now, timeout = time.time(), generation_timeout()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), timeout)
+        cache.set(CHANGED_KEY.format(scope), now, timeout)
+
+
+def fragment_context(request, *scopes):
+    """Контекст для {% cache %} ленты: срок жизни и версия фрагмента."""
+    generations = [str(generation(scope)) for scope in scopes]
+    position = request.GET.get('cursor') or request.GET.get('page') or ''
+    return {
+        'fragment_timeout': fragment_timeout(),
+        'fragment_version': ':'.join(
+            [*generations, settings.POSTS_PAGINATION, position]
+        ),
+    }
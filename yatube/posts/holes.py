@@ -0,0 +1,73 @@
+"""Персональные куски страниц постов, см. core.holes."""
+from django.template.loader import render_to_string
+
+from core.holes import register
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@register('switcher')
+def switcher(request, active):
+    return render_to_string(
+        'posts/includes/switcher.html', {active: True}, request=request
+    )
+
+
+@register('follow_button')
+def follow_button(request, username):
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author__username=username
+        ).exists()
+    )
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request=request,
+    )
+
+
+def _is_author(request, author_id):
+    return str(request.user.pk) == author_id
+
+
+@register('post_controls')
+def post_controls(request, post_id, author_id):
+    if not _is_author(request, author_id):
+        return ''
+    return render_to_string(
+        'posts/includes/post_controls.html', {'post_id': post_id},
+        request=request,
+    )
+
+
+@register('comment_controls')
+def comment_controls(request, comment_id, author_id):
+    if not _is_author(request, author_id):
+        return ''
+    return render_to_string(
+        'posts/includes/comment_controls.html', {'comment_id': comment_id},
+        request=request,
+    )
+
+
+@register('comment_form')
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'posts/includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request,
+    )
+
+
+@register('comment_delete_modal')
+def comment_delete_modal(request):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'posts/includes/comment_delete_modal.html', request=request
+    )
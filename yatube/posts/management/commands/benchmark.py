@@ -0,0 +1,319 @@
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.queries import QueryLog
+from core.stats import percentile
+from posts import timeline
+from posts.models import Follow, Group, Post
+from users.models import Profile
+
+User = get_user_model()
+
+DEFAULT_SIZES = '10000,100000,1000000'
+BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'yatube-bench')
+
+
+def compare(results, baseline, tolerance):
+    """Строки сравнения и список регрессий.
+
+    Регрессия — медиана дольше базовой больше чем на tolerance
+    или больше запросов к базе.
+    """
+    lines, regressions = [], []
+    for size, views in results.items():
+        for view, current in views.items():
+            base = baseline.get(size, {}).get(view)
+            if base is None:
+                lines.append(f'{size} {view}: нет в базовой линии')
+                continue
+            change = current['p50_ms'] / base['p50_ms'] - 1 if (
+                base['p50_ms']
+            ) else 0
+            line = (
+                f'{size} {view}: p50 {base["p50_ms"]} → '
+                f'{current["p50_ms"]} мс ({change:+.0%}), запросов '
+                f'{base["queries"]} → {current["queries"]}'
+            )
+            lines.append(line)
+            if change > tolerance or current['queries'] > base['queries']:
+                regressions.append(line)
+    return lines, regressions
+
+
+@contextmanager
+def database(path):
+    """Переключает соединение default на файл SQLite, как тест-раннер."""
+    connection = connections['default']
+    original = connection.settings_dict['NAME']
+    connection.close()
+    # close() не закрывает базу в памяти (в тестах): её соединение
+    # откладывается и возвращается после замеров.
+    saved, connection.connection = connection.connection, None
+    connection.settings_dict['NAME'] = path
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original
+        connection.connection = saved
+
+
+def remove_database(path):
+    """Удаляет файл SQLite вместе с журналами."""
+    for name in (path, f'{path}-journal', f'{path}-wal', f'{path}-shm'):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет ленты, страницы постов и формы тестовым клиентом '
+        'на базах нескольких размеров и сравнивает с базовой линией. '
+        'Каждый проход работает с копией заполненной базы: записи форм '
+        'фиксируются и хуки on_commit срабатывают, как в работе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=DEFAULT_SIZES,
+            help='Размеры баз в постах через запятую'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз запрашивать каждую страницу'
+        )
+        parser.add_argument(
+            '--data-dir', default=DATA_DIR,
+            help='Каталог с заполненными базами; они создаются один раз'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--cache', choices=('warm', 'cold', 'both'), default='both',
+            help='warm — кэши как в работе, cold — очищать кэш перед '
+                 'каждым запросом, чтобы view выполнялась целиком'
+        )
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON'
+        )
+        parser.add_argument(
+            '--baseline', default=BASELINE,
+            help='Файл базовой линии для сравнения'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новую базовую линию'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост медианы, доля'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        os.makedirs(options['data_dir'], exist_ok=True)
+        results = {}
+        for size in sizes:
+            path = os.path.join(
+                options['data_dir'], f'posts-{size}-{options["seed"]}.sqlite3'
+            )
+            if not os.path.exists(path):
+                self.seed(size, path)
+            results[str(size)] = self.run(size, path)
+        self.write(results)
+
+    def seed(self, size, path):
+        """Заполняет базу во временном файле и переименовывает его.
+
+        Прерванное заполнение не оставляет неполную базу под именем,
+        которое следующие запуски взяли бы как готовую.
+        """
+        self.stdout.write(f'Заполнение базы на {size} постов…')
+        partial = f'{path}.partial'
+        remove_database(partial)
+        with database(partial):
+            call_command('migrate', verbosity=0, interactive=False)
+            users = max(100, size // 100)
+            call_command(
+                'seed', posts=size, comments=size * 2, users=users,
+                follows=users * 20, groups=50, seed=self.options['seed'],
+                search=True, stdout=self.stdout,
+            )
+        os.replace(partial, path)
+
+    def cases(self):
+        """Страницы: (имя, клиент, функция номера итерации → запрос)."""
+        author = Profile.objects.order_by('-posts_count').first().user
+        reader = Profile.objects.order_by('-following_count').first().user
+        group = Group.objects.order_by('-posts_count').first()
+        post = Post.objects.order_by('-comments_count').first()
+        own_post = Post.objects.filter(author=author).first()
+        word = post.text.split()[0]
+        followed = list(
+            Follow.objects.filter(user=reader)
+            .values_list('author__username', flat=True)
+        )
+        strangers = list(
+            User.objects.exclude(following__user=reader).exclude(pk=reader.pk)
+            .values_list('username', flat=True)[:self.options['repeat'] + 2]
+        )
+        timeline.rebuild(reader.pk)
+
+        guest, reader_client, author_client = Client(), Client(), Client()
+        reader_client.force_login(reader)
+        author_client.force_login(author)
+
+        def get(name, **kwargs):
+            return lambda number: ('get', reverse(name, kwargs=kwargs), None)
+
+        return [
+            ('index', guest, get('posts:index')),
+            ('index:reader', reader_client, get('posts:index')),
+            ('group_posts', guest, get('posts:group_posts', slug=group.slug)),
+            ('profile', guest, get(
+                'posts:profile', username=author.username
+            )),
+            ('follow_index', reader_client, get('posts:follow_index')),
+            ('search', guest, lambda number: (
+                'get', reverse('posts:search'), {'q': word}
+            )),
+            ('post_detail', guest, get('posts:post_detail', post_id=post.pk)),
+            ('post_detail:reader', reader_client, get(
+                'posts:post_detail', post_id=post.pk
+            )),
+            ('post_comments', guest, get(
+                'posts:post_comments', post_id=post.pk
+            )),
+            ('post_create', reader_client, lambda number: (
+                'post', reverse('posts:post_create'),
+                {'text': f'Замер {number}'},
+            )),
+            ('post_edit', author_client, lambda number: (
+                'post', reverse('posts:post_edit', args=(own_post.pk,)),
+                {'text': f'Правка {number}'},
+            )),
+            ('add_comment', reader_client, lambda number: (
+                'post', reverse('posts:add_comment', args=(post.pk,)),
+                {'text': f'Комментарий {number}'},
+            )),
+            ('profile_follow', reader_client, lambda number: (
+                'get', reverse('posts:profile_follow', args=(
+                    strangers[number % len(strangers)],
+                )), None,
+            )),
+            ('profile_unfollow', reader_client, lambda number: (
+                'get', reverse('posts:profile_unfollow', args=(
+                    followed[number % len(followed)],
+                )), None,
+            )),
+        ]
+
+    def request(self, client, build, number):
+        if self.cold:
+            cache.clear()
+        method, url, data = build(number)
+        response = getattr(client, method)(url, data)
+        if response.status_code >= 400:
+            raise CommandError(f'{url}: ответ {response.status_code}')
+
+    def measure(self, client, build):
+        repeat = self.options['repeat']
+        # Первый запрос прогревает кэши и не учитывается.
+        self.request(client, build, repeat)
+        timings, queries = [], []
+        for number in range(repeat):
+            with QueryLog() as log:
+                start = time.perf_counter()
+                self.request(client, build, number)
+                timings.append(time.perf_counter() - start)
+            queries.append(len(log))
+        # Память отдельным проходом: tracemalloc замедляет запросы.
+        tracemalloc.start()
+        try:
+            self.request(client, build, repeat + 1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            'queries': max(queries),
+            'peak_kib': round(peak / 1024),
+        }
+
+    @override_settings(
+        DEBUG=False, NPLUSONE_DETECT=False,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+    )
+    def run(self, size, path):
+        modes = self.options['cache']
+        modes = ('warm', 'cold') if modes == 'both' else (modes,)
+        results = {}
+        for mode in modes:
+            self.cold = mode == 'cold'
+            # Каждый проход начинается с одних и тех же данных.
+            copy = f'{path}.run'
+            shutil.copyfile(path, copy)
+            try:
+                with database(copy):
+                    cache.clear()
+                    results.update(self.run_cases(size, self.cases()))
+            finally:
+                remove_database(copy)
+        return results
+
+    def run_cases(self, size, cases):
+        results = {}
+        for name, client, build in cases:
+            if self.cold:
+                name += ':cold'
+            results[name] = stats = self.measure(client, build)
+            self.stdout.write(
+                f'{size} {name}: p50 {stats["p50_ms"]} мс, '
+                f'p95 {stats["p95_ms"]} мс, запросов {stats["queries"]}, '
+                f'память {stats["peak_kib"]} КиБ'
+            )
+        return results
+
+    def write(self, results):
+        options = self.options
+        if options['output']:
+            with open(options['output'], 'w') as file_:
+                json.dump(results, file_, indent=2, ensure_ascii=False)
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w') as file_:
+                json.dump(results, file_, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовая линия записана: {options["baseline"]}'
+            ))
+            return
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline']) as file_:
+            baseline = json.load(file_)
+        lines, regressions = compare(results, baseline, options['tolerance'])
+        for line in lines:
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базовой линии:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
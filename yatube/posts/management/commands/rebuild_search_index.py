@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет полнотекстовый индекс постов и комментариев заново.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.clear()
+            posts = Post.objects.values_list('pk', 'pk', 'text')
+            comments = Comment.objects.values_list('pk', 'post_id', 'text')
+            for kind, rows in ((search.POST, posts),
+                               (search.COMMENT, comments)):
+                total = 0
+                for pk, post_id, text in rows.iterator():
+                    search.index(kind, pk, post_id, text)
+                    total += 1
+                self.stdout.write(
+                    self.style.SUCCESS(f'Проиндексировано ({kind}): {total}')
+                )
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заполняет материализованные ленты подписок заново.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи ленты нужно перестроить (по умолчанию все)'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(follower__isnull=False) | Q(timeline__isnull=False)
+        ).distinct()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        # id читаются пачками до перестройки: открытый курсор держал бы
+        # снимок чтения, и WAL не сбрасывался бы, пока идёт команда.
+        user_ids = users.order_by('pk').values_list('pk', flat=True)
+        total, last = 0, 0
+        while True:
+            batch = list(
+                user_ids.filter(pk__gt=last)[:settings.TIMELINE_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for user_id in batch:
+                timeline.rebuild(user_id)
+            total += len(batch)
+            last = batch[-1]
+        self.stdout.write(
+            self.style.SUCCESS(f'Перестроено лент: {total}')
+        )
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Follow, Group, Post
+from users.models import Profile
+
+
+def count_of(model, field, ref='pk'):
+    """Подзапрос с числом строк model, ссылающихся на внешнюю строку."""
+    rows = model.objects.filter(**{field: OuterRef(ref)}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+COUNTERS = (
+    (Group, {'posts_count': count_of(Post, 'group')}),
+    (Post, {'comments_count': count_of(Comment, 'post')}),
+    (Profile, {
+        'posts_count': count_of(Post, 'author', 'user_id'),
+        'followers_count': count_of(Follow, 'author', 'user_id'),
+        'following_count': count_of(Follow, 'user', 'user_id'),
+    }),
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк проверять за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, counters in COUNTERS:
+            fixed = 0
+            last_pk = 0
+            while True:
+                batch = model.objects.filter(pk__gt=last_pk).order_by('pk')
+                rows = list(
+                    batch.annotate(**{
+                        f'actual_{name}': expression
+                        for name, expression in counters.items()
+                    }).values('pk', *counters, *(
+                        f'actual_{name}' for name in counters
+                    ))[:batch_size]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1]['pk']
+                drifted = [
+                    row['pk'] for row in rows
+                    if any(
+                        row[name] != row[f'actual_{name}']
+                        for name in counters
+                    )
+                ]
+                if drifted:
+                    # Пересчёт тем же подзапросом в UPDATE не теряет
+                    # инкременты, пришедшие после чтения пачки.
+                    model.objects.filter(pk__in=drifted).update(**counters)
+                    fixed += len(drifted)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: исправлено {fixed}'
+            ))
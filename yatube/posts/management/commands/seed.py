@@ -0,0 +1,284 @@
+import random
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+from users.models import Profile
+
+User = get_user_model()
+
+# Столько предложений Faker генерирует заранее; тексты собираются
+# из них, иначе на миллионах строк Faker работал бы часами.
+SENTENCES = 5000
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add, чтобы даты были разнесены во времени."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def power_law(count, alpha):
+    """Накопленные веса рангов 1..count: вес ранга r равен 1 / r^alpha."""
+    return list(accumulate(
+        1 / rank ** alpha for rank in range(1, count + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными: пользователи, группы, '
+        'посты, комментарии и подписки со степенной популярностью авторов.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, text in (
+            ('users', 10000, 'Число пользователей'),
+            ('groups', 50, 'Число групп'),
+            ('posts', 1000000, 'Число постов'),
+            ('comments', 2000000, 'Число комментариев'),
+            ('follows', 200000, 'Число подписок'),
+            ('batch-size', 5000, 'Строк в одном bulk_create'),
+            ('seed', 42, 'Зерно генератора: одно зерно — одни данные'),
+            ('days', 365, 'За сколько дней до --end разнесены публикации'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=text
+            )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности авторов'
+        )
+        parser.add_argument(
+            '--end', default='2024-01-01',
+            help='Дата самой поздней публикации, ГГГГ-ММ-ДД'
+        )
+        parser.add_argument(
+            '--password', default='yatube-seed',
+            help='Пароль всех созданных пользователей'
+        )
+        parser.add_argument(
+            '--timelines', action='store_true',
+            help='Заполнить ленты подписок (долго на больших объёмах)'
+        )
+        parser.add_argument(
+            '--search', action='store_true',
+            help='Перестроить поисковый индекс'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(options['seed'])
+        self.sentences = [self.faker.sentence() for _ in range(SENTENCES)]
+        end = datetime.strptime(options['end'], '%Y-%m-%d')
+        self.end = timezone.make_aware(end, timezone.utc)
+        self.span = options['days'] * 24 * 60 * 60
+
+        with explicit_dates(
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        ), transaction.atomic():
+            users = self.create_users()
+            # Ранги популярности не зависят от порядка pk.
+            popular = users[:]
+            self.random.shuffle(popular)
+            weights = power_law(len(popular), options['alpha'])
+            posts = self.plan_posts(popular, weights)
+            self.create_groups(posts)
+            follows = self.create_follows(users, popular, weights)
+            self.create_posts(posts)
+            self.create_comments(users, posts)
+            self.create_profiles(users, posts, follows)
+        cache.clear()
+        if options['timelines']:
+            call_command('rebuild_timelines', stdout=self.stdout)
+        if options['search']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+
+    def text(self, low, high):
+        count = self.random.randint(low, high)
+        return ' '.join(self.random.choices(self.sentences, k=count))
+
+    def bulk(self, model, objects):
+        """bulk_create пачками: save() и его сигналы не вызываются."""
+        batch_size = self.options['batch_size']
+        batch, total = [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == batch_size:
+                model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'{model._meta.verbose_name_plural}: {total}'
+        ))
+
+    def create_users(self):
+        first = next_pk(User)
+        count = self.options['users']
+        password = make_password(self.options['password'])
+        joined = self.end - timedelta(seconds=self.span)
+        self.bulk(User, (
+            User(
+                pk=first + number,
+                username=f'{self.faker.user_name()}{first + number}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=password,
+                date_joined=joined,
+            )
+            for number in range(count)
+        ))
+        return list(range(first, first + count))
+
+    def plan_posts(self, popular, weights):
+        """Авторы, группы, возраст и число комментариев постов.
+
+        Посты популярных авторов и комментируют чаще; у трети постов
+        нет группы, популярность групп тоже степенная.
+        """
+        count = self.options['posts']
+        self.first_group = next_pk(Group)
+        groups = list(range(
+            self.first_group, self.first_group + self.options['groups']
+        ))
+        group_weights = power_law(len(groups), 1)
+        authors = self.random.choices(popular, cum_weights=weights, k=count)
+        plan = {
+            'first': next_pk(Post),
+            'authors': authors,
+            'groups': [
+                self.random.choices(groups, cum_weights=group_weights)[0]
+                if groups and self.random.random() < 2 / 3 else None
+                for _ in range(count)
+            ],
+            'ages': [self.random.random() * self.span for _ in range(count)],
+            'comments': [0] * count,
+        }
+        if count:
+            rank_weight = dict(zip(popular, (
+                weight - previous
+                for weight, previous in zip(weights, [0] + weights[:-1])
+            )))
+            post_weights = list(accumulate(
+                rank_weight[author] for author in authors
+            ))
+            total = post_weights[-1]
+            for _ in range(self.options['comments']):
+                plan['comments'][bisect_left(
+                    post_weights, self.random.random() * total
+                )] += 1
+        return plan
+
+    def create_groups(self, posts):
+        posts_count = Counter(posts['groups'])
+        self.bulk(Group, (
+            Group(
+                pk=pk,
+                title=self.faker.catch_phrase()[:200],
+                slug=f'group-{pk}',
+                description=self.text(1, 3),
+                posts_count=posts_count[pk],
+            )
+            for pk in range(
+                self.first_group, self.first_group + self.options['groups']
+            )
+        ))
+
+    def create_follows(self, users, popular, weights):
+        """Подписчик случайный, автор — по степенному закону."""
+        count = min(self.options['follows'], len(users) * (len(users) - 1))
+        pairs = set()
+        while len(pairs) < count:
+            for author in self.random.choices(
+                popular, cum_weights=weights, k=count - len(pairs)
+            ):
+                user = self.random.choice(users)
+                if user != author:
+                    pairs.add((user, author))
+        pairs = sorted(pairs)
+        first = next_pk(Follow)
+        self.bulk(Follow, (
+            Follow(pk=first + number, user_id=user, author_id=author)
+            for number, (user, author) in enumerate(pairs)
+        ))
+        return pairs
+
+    def create_posts(self, posts):
+        self.bulk(Post, (
+            Post(
+                pk=posts['first'] + number,
+                text=self.text(1, 6),
+                author_id=author,
+                group_id=posts['groups'][number],
+                pub_date=self.end - timedelta(seconds=posts['ages'][number]),
+                comments_count=posts['comments'][number],
+            )
+            for number, author in enumerate(posts['authors'])
+        ))
+
+    def create_comments(self, users, posts):
+        """Комментарии пишутся после поста, к которому оставлены."""
+        first = next_pk(Comment)
+
+        def comments():
+            pk = first
+            for number, count in enumerate(posts['comments']):
+                for _ in range(count):
+                    age = self.random.random() * posts['ages'][number]
+                    yield Comment(
+                        pk=pk,
+                        post_id=posts['first'] + number,
+                        author_id=self.random.choice(users),
+                        text=self.text(1, 2),
+                        created=self.end - timedelta(seconds=age),
+                    )
+                    pk += 1
+
+        self.bulk(Comment, comments())
+
+    def create_profiles(self, users, posts, follows):
+        posts_count = Counter(posts['authors'])
+        followers = Counter(author for _, author in follows)
+        following = Counter(user for user, _ in follows)
+        first = next_pk(Profile)
+        self.bulk(Profile, (
+            Profile(
+                pk=first + number,
+                user_id=user,
+                bio=self.text(0, 2),
+                posts_count=posts_count[user],
+                followers_count=followers[user],
+                following_count=following[user],
+            )
+            for number, user in enumerate(users)
+        ))
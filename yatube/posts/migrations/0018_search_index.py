@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_image_meta'),
+    ]
+
+    operations = [
+        # rowid = 2 * id для постов и 2 * id + 1 для комментариев;
+        # body хранит текст в нижнем регистре с «ё», заменённой на «е».
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE posts_search USING fts5("
+            "body, kind UNINDEXED, post_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3 4')",
+            'DROP TABLE posts_search',
+        ),
+    ]
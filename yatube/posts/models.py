@@ -1,12 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.models import CountersMixin, SerializedWritesMixin
+
 
 User = get_user_model()
 
 
-class Group(models.Model):
+class Group(CountersMixin, models.Model):
     """Модель групп."""
+    counter_fields = ("posts_count",)
+
     title = models.CharField(
         verbose_name="Название",
         help_text="Укажите название группы",
@@ -19,6 +23,11 @@ class Group(models.Model):
         verbose_name="Описание",
         help_text="Укажите общую информацию о группе"
     )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Число постов",
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = "Группа"
@@ -28,8 +37,10 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(SerializedWritesMixin, CountersMixin, models.Model):
     """Модель постов."""
+    counter_fields = ("comments_count",)
+
     text = models.TextField(
         verbose_name="Текст",
         help_text="Текст поста",
@@ -60,17 +71,41 @@ class Post(models.Model):
         upload_to="posts/",
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        "Ширина картинки", null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        "Высота картинки", null=True, blank=True, editable=False
+    )
+    image_hash = models.CharField(
+        "SHA-256 картинки", max_length=64, blank=True, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name="Число комментариев",
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_date_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_date_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]  # Первые 15 символов поста.
 
 
-class Comment(models.Model):
+class Comment(SerializedWritesMixin, models.Model):
     """Модель комментариев."""
     post = models.ForeignKey(
         Post,
@@ -100,12 +135,18 @@ class Comment(models.Model):
         ordering = ("-created",)
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["post", "-created", "-id"],
+                name="comment_post_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]  # Первые 15 символов коммента.
 
 
-class Follow(models.Model):
+class Follow(SerializedWritesMixin, models.Model):
     """Модель подписок."""
     user = models.ForeignKey(
         User,
@@ -131,6 +172,59 @@ class Follow(models.Model):
                 name="prevent_self_follow",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"],
+                name="follow_author_user_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} follows {self.author}"
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок пользователя.
+
+    Заполняется при публикации поста и при подписке, поэтому страница
+    ленты читается одним диапазоном по индексу (user, -pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name="Читатель",
+        on_delete=models.CASCADE,
+        related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name="Пост",
+        on_delete=models.CASCADE,
+        related_name="timeline_entries"
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        ordering = ("-pub_date",)
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"],
+                name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-id"],
+                name="timeline_user_date_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post} for {self.user}"
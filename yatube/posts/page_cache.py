@@ -0,0 +1,160 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import fragments
+
+PAGE_KEY = 'pages:{}'
+SHARED_KEY = 'shared-pages:{}'
+# Параметры, от которых зависит содержимое кэшируемых страниц; запросы
+# с другими параметрами не кэшируются, чтобы ими нельзя было забить кэш.
+PAGE_PARAMS = {'cursor', 'page'}
+
+
+def tag_page(request, *tags):
+    """Помечает страницу областями кэша фрагментов (тегами).
+
+    Поколения читаются сразу, до рендеринга: если пост изменится, пока
+    страница рендерится, запись окажется устаревшей и не будет отдана.
+    """
+    if not hasattr(request, 'page_cache_tags'):
+        return
+    tags = set(tags) - set(request.page_cache_tags)
+    request.page_cache_tags.update(fragments.generations(tags))
+
+
+def post_tags(posts):
+    """Теги авторов и групп постов страницы."""
+    tags = set()
+    for post in posts:
+        tags.add(f'author:{post.author_id}')
+        if post.group_id is not None:
+            tags.add(f'group:{post.group_id}')
+    return tags
+
+
+def _key(template, request):
+    return template.format(
+        hashlib.md5(request.get_full_path().encode()).hexdigest()
+    )
+
+
+def _cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and set(request.GET) <= PAGE_PARAMS
+    )
+
+
+def _cacheable_response(request, response):
+    """Кэшируются только страницы без куки и CSRF-токенов."""
+    return (
+        response.status_code == 200
+        and request.page_cache_tags
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _fresh(entry):
+    return fragments.generations(entry['tags']) == entry['tags']
+
+
+def shared_page(view):
+    """Кэширует страницу, общую для всех пользователей.
+
+    Всё, что зависит от пользователя, шаблоны выводят дырами
+    (core.holes); HolePunchMiddleware заполняет их уже после кэша.
+    """
+    @wraps(view)
+    def wrapper(request, **kwargs):
+        if not _cacheable_request(request):
+            return view(request, **kwargs)
+        key = _key(SHARED_KEY, request)
+        entry = cache.get(key)
+        if entry is not None and _fresh(entry):
+            tag_page(request, *entry['tags'])
+            return HttpResponse(
+                entry['content'], content_type=entry['content_type']
+            )
+        if not hasattr(request, 'page_cache_tags'):
+            request.page_cache_tags = {}
+        response = view(request, **kwargs)
+        if _cacheable_response(request, response):
+            cache.set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'tags': request.page_cache_tags,
+            }, settings.PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+class AnonymousPageCacheMiddleware:
+    """Кэш целых страниц для гостей.
+
+    Стоит перед сессиями и аутентификацией: попадание в кэш отдаётся
+    без них. Страница кэшируется, если view пометила её тегами через
+    tag_page; запись устаревает, когда сигналы сдвигают поколение
+    любого её тега (fragments.bump).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            return self.get_response(request)
+        key = _key(PAGE_KEY, request)
+        entry = cache.get(key)
+        if entry is not None and _fresh(entry):
+            return self.cached_response(request, entry)
+        request.page_cache_tags = {}
+        response = self.get_response(request)
+        if (
+            _cacheable_response(request, response)
+            and 'private' not in response.get('Cache-Control', '')
+        ):
+            cache.set(key, {
+                'content': response.content,
+                'headers': dict(response.items()),
+                'tags': request.page_cache_tags,
+            }, settings.PAGE_CACHE_TIMEOUT)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+    def cacheable_request(self, request):
+        if (
+            settings.DEBUG
+            or not _cacheable_request(request)
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        # Попадание отдаётся без обработчика URL: маршрут нужен метрикам.
+        request.resolver_match = match
+        return match.view_name in settings.PAGE_CACHE_VIEWS
+
+    def cached_response(self, request, entry):
+        response = HttpResponse(entry['content'])
+        for header, value in entry['headers'].items():
+            response[header] = value
+        response['X-Page-Cache'] = 'hit'
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')
+            ),
+            response=response,
+        )
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+FORWARD = 'next'
+BACKWARD = 'prev'
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию в ленте в непрозрачную строку для URL."""
+    raw = json.dumps([direction, value.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для битого курсора возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, value, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode()).decode()
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    value = parse_datetime(value) if isinstance(value, str) else None
+    if (
+        direction not in (FORWARD, BACKWARD)
+        or value is None
+        or not isinstance(pk, int)
+    ):
+        return None
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (дата, id).
+
+    Вместо OFFSET страница выбирается условием по последней показанной
+    записи, поэтому стоимость запроса не зависит от глубины листания,
+    а COUNT(*) не выполняется вовсе.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, per_page, key='-pub_date'):
+        super().__init__(object_list, per_page)
+        self.descending = key.startswith('-')
+        self.key = key.lstrip('-')
+        self.continued = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def _ordering(self, reverse=False):
+        prefix = '-' if self.descending != reverse else ''
+        return (f'{prefix}{self.key}', f'{prefix}pk')
+
+    def _after(self, value, pk, reverse=False):
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.key}__{lookup}': value})
+            | Q(**{self.key: value, f'pk__{lookup}': pk})
+        )
+
+    def _cursor_for(self, direction, obj):
+        return encode_cursor(direction, getattr(obj, self.key), obj.pk)
+
+    def page(self, cursor=None):
+        """Возвращает страницу, следующую за позицией из курсора."""
+        position = decode_cursor(cursor)
+        queryset = self.object_list
+        backward = position is not None and position[0] == BACKWARD
+        if position is not None:
+            _, value, pk = position
+            queryset = queryset.filter(
+                self._after(value, pk, reverse=backward)
+            )
+        rows = list(
+            queryset.order_by(*self._ordering(reverse=backward))
+            [:self.per_page + 1]
+        )
+        if backward and not rows:
+            # Более новых записей не осталось: показываем начало ленты.
+            return self.page()
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.continued = has_previous
+        if rows:
+            self.next_cursor = (
+                self._cursor_for(FORWARD, rows[-1]) if has_next else None
+            )
+            self.previous_cursor = (
+                self._cursor_for(BACKWARD, rows[0]) if has_previous else None
+            )
+        return self._get_page(rows, 1, self)
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+TABLE = 'posts_search'
+POST, COMMENT = 'post', 'comment'
+
+WORD = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    (('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'), False),
+    (('вшись', 'вши', 'в'), True),
+)
+REFLEXIVE = ('ся', 'сь')
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей',
+    'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    (('ивш', 'ывш', 'ующ'), False),
+    (('ем', 'нн', 'вш', 'ющ', 'щ'), True),
+)
+VERB = (
+    (('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+      'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+      'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'), False),
+    (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+      'ют', 'ны', 'ть', 'ешь', 'нно'), True),
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'иях', 'ией', 'иям', 'ием', 'ев', 'ов', 'ие', 'ье',
+    'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию',
+    'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+
+
+def normalize(text):
+    """Текст для индекса: нижний регистр, «ё» как «е»."""
+    return text.lower().replace('ё', 'е')
+
+
+def _strip(word, groups):
+    """Отрезает самое длинное окончание; True во второй позиции группы
+    требует, чтобы перед окончанием стояла «а» или «я»."""
+    best = None
+    for endings, after_a in groups:
+        for ending in endings:
+            if not word.endswith(ending):
+                continue
+            if after_a and not word[:-len(ending)].endswith(('а', 'я')):
+                continue
+            if best is None or len(ending) > len(best):
+                best = ending
+    return word[:-len(best)] if best else None
+
+
+def stem(word):
+    """Облегчённый стеммер Snowball для русского языка (без шага R2)."""
+    for position, letter in enumerate(word):
+        if letter in VOWELS:
+            break
+    else:
+        return word
+    prefix, rv = word[:position + 1], word[position + 1:]
+
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        rv = _strip(rv, ((REFLEXIVE, False),)) or rv
+        stripped = _strip(rv, ((ADJECTIVE, False),))
+        if stripped is not None:
+            stripped = _strip(stripped, PARTICIPLE) or stripped
+        else:
+            stripped = _strip(rv, VERB)
+            if stripped is None:
+                stripped = _strip(rv, ((NOUN, False),))
+    if stripped is not None:
+        rv = stripped
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif rv.endswith('ь'):
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def match_expression(query):
+    """Запрос пользователя в выражение FTS5: основы слов с префиксом.
+
+    «Ёжики бежали» превращается в "ежик"* "бежа"*, что находит любые
+    формы обоих слов; слова экранируются кавычками.
+    """
+    terms = [stem(word) for word in WORD.findall(normalize(query))]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+
+def _rowid(kind, pk):
+    return pk * 2 + (kind == COMMENT)
+
+
+def index(kind, pk, post_id, text):
+    """Добавляет или обновляет текст поста или комментария в индексе."""
+    rowid = _rowid(kind, pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, body, kind, post_id) '
+            'VALUES (%s, %s, %s, %s)',
+            [rowid, normalize(text), kind, post_id],
+        )
+
+
+def unindex(kind, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, pk)]
+        )
+
+
+def unindex_post(post_id):
+    """Убирает из индекса пост вместе со всеми его комментариями."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE post_id = %s', [post_id])
+
+
+def clear():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def matching_ids(query, kind):
+    """Подзапрос id постов или комментариев, найденных по запросу."""
+    return RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s AND kind = %s',
+        (match_expression(query) or '""', kind),
+    )
+
+
+def encode_cursor(rank, post_id):
+    raw = json.dumps([rank, post_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, post_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode()).decode()
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if not isinstance(rank, (int, float)) or not isinstance(post_id, int):
+        return None
+    return rank, post_id
+
+
+class SearchPaginator(Paginator):
+    """Результаты поиска по BM25 с листанием по ключу (ранг, id поста).
+
+    Пост ранжируется по лучшему совпадению среди его текста
+    и комментариев.
+    """
+    cursor_mode = True
+
+    def __init__(self, query, per_page):
+        super().__init__(Post.objects.none(), per_page)
+        self.expression = match_expression(query)
+        self.continued = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def page(self, cursor=None):
+        if not self.expression:
+            return self._get_page([], 1, self)
+        position = decode_cursor(cursor)
+        self.continued = position is not None
+        having, params = '', [self.expression]
+        if position is not None:
+            having = 'HAVING score > %s OR (score = %s AND post_id > %s)'
+            params += [position[0], position[0], position[1]]
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(
+                # Скрытый столбец rank равен bm25(); сама функция
+                # в агрегате недоступна.
+                f'SELECT post_id, MIN(rank) AS score FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s GROUP BY post_id {having} '
+                'ORDER BY score, post_id LIMIT %s',
+                [*params, self.per_page + 1],
+            )
+            rows = db_cursor.fetchall()
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            self.next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        return self._get_page(
+            [posts[post_id] for post_id, _ in rows if post_id in posts],
+            1, self
+        )
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
@@ -0,0 +1,179 @@
+from threading import local
+from weakref import WeakValueDictionary
+
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from core.thumbnails import thumbnail_ready
+from users.models import Profile
+
+from . import counters, fragments, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+# Удаляемые посты по id. Каскад шлёт сигналы по каждому комментарию,
+# а счётчик удалённого поста обновлять незачем и из индекса комментарии
+# убираются вместе с постом. Комментарий в pre_delete запоминает свой
+# пост и в post_delete пропускает эту работу, только если пост уже удалён.
+# Ссылки слабые: запись неудавшегося удаления пропадает вместе с постом.
+_deleting = local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = WeakValueDictionary()
+    return _deleting.posts
+
+
+def post_scopes(post):
+    """Области кэша фрагментов, в которых показывается пост."""
+    scopes = ['index', f'post:{post.pk}', f'author:{post.author_id}']
+    for group_id in {post.group_id, getattr(post, '_old_group_id', None)}:
+        if group_id is not None:
+            scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def comment_scopes(comment):
+    """Области списков API, где виден comments_count поста комментария.
+
+    Отдельные от post_scopes: HTML-ленты число комментариев не выводят,
+    и их фрагменты из-за комментариев сбрасывать незачем.
+    """
+    post = comment.post
+    scopes = ['comments', f'comments:author:{post.author_id}']
+    if post.group_id is not None:
+        scopes.append(f'comments:group:{post.group_id}')
+    return scopes
+
+
+def follow_scopes(follow):
+    """Области, которые меняет подписка: лента и счётчики профилей."""
+    return (
+        f'follow:{follow.user_id}',
+        f'author:{follow.user_id}',
+        f'author:{follow.author_id}',
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю группу поста, чтобы сбросить и её ленту."""
+    if instance.pk and not raw:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Поддерживает ленты подписчиков при публикации и правке поста."""
+    if raw:
+        return
+    if created:
+        timeline.fan_out_post(instance)
+        counters.post_added(instance)
+    else:
+        timeline.sync_post(instance)
+        old_group_id = getattr(instance, '_old_group_id', None)
+        if old_group_id != instance.group_id:
+            counters.group_moved(old_group_id, instance.group_id)
+    search.index(search.POST, instance.pk, instance.pk, instance.text)
+    fragments.bump(*post_scopes(instance))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting_posts()[instance.pk] = instance
+
+
+@receiver(pre_delete, sender=Comment)
+def comment_deleting(sender, instance, **kwargs):
+    instance._deleting_post = deleting_posts().get(instance.post_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().pop(instance.pk, None)
+    instance._deleted = True
+    counters.post_added(instance, delta=-1)
+    search.unindex_post(instance.pk)
+    fragments.bump(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index(
+        search.COMMENT, instance.pk, instance.post_id, instance.text
+    )
+    if created:
+        counters.comment_added(instance)
+        fragments.bump(*comment_scopes(instance))
+    fragments.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    post = getattr(instance, '_deleting_post', None)
+    if getattr(post, '_deleted', False):
+        return
+    counters.comment_added(instance, delta=-1)
+    search.unindex(search.COMMENT, instance.pk)
+    fragments.bump(f'post:{instance.post_id}', *comment_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Название группы выводится в карточках постов всех лент."""
+    fragments.bump('groups', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        fragments.bump(f'author:{instance.user_id}')
+
+
+@receiver(thumbnail_ready, sender=Post)
+def post_thumbnail_ready(sender, instance, **kwargs):
+    """Заменяет заглушку картинки в закэшированных лентах."""
+    fragments.bump(*post_scopes(instance))
+
+
+@receiver(thumbnail_ready, sender=Profile)
+def profile_thumbnail_ready(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        fragments.bump(f'author:{instance.user_id}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Имя автора выводится в карточках постов всех лент.
+
+    Обновление last_login при входе на карточки не влияет.
+    """
+    if created or update_fields == frozenset(['last_login']):
+        return
+    fragments.bump('authors', f'author:{instance.pk}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """Добавляет посты автора в ленту нового подписчика."""
+    if created and not raw:
+        timeline.add_author(instance.user_id, instance.author_id)
+        counters.follow_added(instance)
+        fragments.bump(*follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    timeline.remove_author(instance.user_id, instance.author_id)
+    counters.follow_added(instance, delta=-1)
+    fragments.bump(*follow_scopes(instance))
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from ..management.commands.benchmark import compare, percentile
+from ..models import Post
+
+
+class BenchmarkStatsTests(SimpleTestCase):
+    """Тесты статистики и сравнения с базовой линией."""
+    def test_percentile(self):
+        values = list(range(1, 21))
+        self.assertEqual(percentile(values, 0.5), 10)
+        self.assertEqual(percentile(values, 0.95), 19)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_compare(self):
+        """Регрессия — рост медианы сверх допуска или числа запросов."""
+        baseline = {'10': {
+            'index': {'p50_ms': 10, 'queries': 3},
+            'profile': {'p50_ms': 10, 'queries': 3},
+            'search': {'p50_ms': 10, 'queries': 3},
+        }}
+        results = {'10': {
+            'index': {'p50_ms': 11, 'queries': 3},
+            'profile': {'p50_ms': 13, 'queries': 3},
+            'search': {'p50_ms': 9, 'queries': 4},
+            'new': {'p50_ms': 1, 'queries': 1},
+        }}
+        lines, regressions = compare(results, baseline, 0.2)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(
+            [line.split(':')[0] for line in regressions],
+            ['10 profile', '10 search']
+        )
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    """Прогон замеров на маленькой базе."""
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+
+    def benchmark(self, *args):
+        call_command(
+            'benchmark', '--sizes=300', '--repeat=2', '--cache=cold',
+            f'--data-dir={self.data_dir}',
+            f'--baseline={os.path.join(self.data_dir, "baseline.json")}',
+            *args, stdout=StringIO(),
+        )
+
+    def test_results_and_baseline(self):
+        """Замеры пишутся в базовую линию, тестовая база не меняется."""
+        test_database = connection.settings_dict['NAME']
+        self.benchmark('--save-baseline')
+        self.assertEqual(connection.settings_dict['NAME'], test_database)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.data_dir, 'posts-300-42.sqlite3')
+        ))
+        self.assertFalse(Post.objects.exists())
+        with open(os.path.join(self.data_dir, 'baseline.json')) as file_:
+            baseline = json.load(file_)
+        views = baseline['300']
+        for name in ('index:cold', 'post_detail:cold', 'post_create:cold'):
+            with self.subTest(view=name):
+                self.assertGreater(views[name]['queries'], 0)
+                self.assertLessEqual(
+                    views[name]['p50_ms'], views[name]['p95_ms']
+                )
+        views['index:cold']['queries'] = 0
+        with open(os.path.join(self.data_dir, 'baseline.json'), 'w') as file_:
+            json.dump(baseline, file_)
+        with self.assertRaisesMessage(CommandError, 'index:cold'):
+            self.benchmark('--tolerance=100')
+
+    def test_interrupted_seed_is_not_reused(self):
+        """Прерванное заполнение не оставляет базу под рабочим именем."""
+        with mock.patch(
+            'posts.management.commands.seed.Command.handle',
+            side_effect=KeyboardInterrupt,
+        ), self.assertRaises(KeyboardInterrupt):
+            self.benchmark()
+        self.assertEqual(os.listdir(self.data_dir), [
+            'posts-300-42.sqlite3.partial'
+        ])
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_NUM=3)
+class CommentsPaginationTests(TestCase):
+    """Тесты порционной загрузки комментариев."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Коммент {number}'
+            )
+            for number in range(8)
+        ]
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_post_detail_renders_first_chunk(self):
+        """На странице поста только первые комментарии, старые сначала."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:3])
+        self.assertContains(response, 'data-comments-more')
+        self.assertNotContains(response, 'Коммент 3')
+
+    def test_chunks_cover_all_comments(self):
+        """Фрагменты по курсору отдают все комментарии без повторов."""
+        seen = []
+        cursor = None
+        while True:
+            response = self.authorized_client.get(
+                self.url, {'cursor': cursor} if cursor else {},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            seen += list(response.context['comments'])
+            cursor = response.context['comments'].paginator.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.comments)
+
+    def test_json_chunk(self):
+        first = self.authorized_client.get(self.url, {'format': 'json'})
+        data = first.json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            [comment.pk for comment in self.comments[:3]]
+        )
+        second = self.authorized_client.get(
+            self.url, {'format': 'json', 'cursor': data['next']}
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in second['comments']],
+            ['Коммент 3', 'Коммент 4', 'Коммент 5']
+        )
+
+    def test_page_without_script(self):
+        """Без скрипта продолжение открывается отдельной страницей."""
+        response = self.authorized_client.get(self.url)
+        self.assertTemplateUsed(response, 'posts/comments.html')
+        self.assertEqual(response.status_code, 200)
+
+    def test_single_delete_modal(self):
+        """Один диалог удаления, адрес берётся из кнопки комментария."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, 'id="deleteCommentModal"', count=1)
+        for comment in self.comments[:3]:
+            self.assertContains(
+                response,
+                'data-action="%s"' % reverse(
+                    'posts:del_comment', kwargs={'comment_id': comment.pk}
+                )
+            )
@@ -0,0 +1,127 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..fragments import CHANGED_KEY
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    """Тесты условного GET страниц лент и поста."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.author.username,)),
+            reverse('posts:post_detail', args=(cls.post.pk,)),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без рендеринга страницы."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertTemplateNotUsed('base.html'):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_index_validation_skips_queries(self):
+        etag = self.client.get(reverse('posts:index'))['ETag']
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:index'), HTTP_IF_NONE_MATCH=etag)
+
+    def test_changes_update_etag(self):
+        """Новый пост и комментарий меняют ETag своих страниц."""
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        Comment.objects.create(post=self.post, author=self.author, text='Ок')
+        self.assertNotEqual(self.client.get(detail)['ETag'], etags[detail])
+        Post.objects.create(text='Ещё', author=self.author, group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Страница вошедшего пользователя не совпадает с гостевой."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_new_login(self):
+        """После нового входа или смены CSRF-токена 304 не отдаётся."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        # Первый ответ выдаёт CSRF-куку, ETag берётся уже с ней.
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(
+            self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304
+        )
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = 'new'
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        relogged = Client()
+        relogged.force_login(self.author)
+        response = relogged.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified(self):
+        """Last-Modified отдаётся, когда изменения старше секунды."""
+        url = reverse('posts:index')
+        for scope in ('index', 'groups', 'authors'):
+            cache.set(CHANGED_KEY.format(scope), time.time() - 60, None)
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Ещё', author=self.author)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_policy(self):
+        """Гостям — public, вошедшим — private; ответ зависит от Cookie."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.client.get(url)
+                self.assertIn('public', guest['Cache-Control'])
+                self.assertIn('Cookie', guest['Vary'])
+                user = self.authorized_client.get(url)
+                self.assertIn('private', user['Cache-Control'])
+                self.assertIn('Cookie', user['Vary'])
+
+    def test_missing_objects(self):
+        response = self.client.get(
+            reverse('posts:group_posts', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from users.models import Profile
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    """Тесты денормализованных счётчиков."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа 1', slug='group-1', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Группа 2', slug='group-2', description='Описание'
+        )
+
+    def counts(self):
+        author = Profile.objects.get(user=self.author)
+        reader = Profile.objects.get(user=self.reader)
+        return {
+            'posts': author.posts_count,
+            'followers': author.followers_count,
+            'following': reader.following_count,
+            'group': Group.objects.get(pk=self.group.pk).posts_count,
+            'other_group': Group.objects.get(
+                pk=self.other_group.pk
+            ).posts_count,
+        }
+
+    def test_write_paths_update_counters(self):
+        """Посты, комментарии и подписки меняют счётчики."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counts(), {
+            'posts': 1, 'followers': 1, 'following': 1,
+            'group': 1, 'other_group': 0,
+        })
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counts()['group'], 0)
+        self.assertEqual(self.counts()['other_group'], 1)
+
+        follow.delete()
+        post.delete()
+        self.assertEqual(self.counts(), {
+            'posts': 0, 'followers': 0, 'following': 0,
+            'group': 0, 'other_group': 0,
+        })
+
+    def test_saving_stale_instance_keeps_counter(self):
+        """Сохранение устаревшего объекта не затирает счётчик."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_reconcile_counters_repairs_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.author)
+        expected = self.counts()
+        Profile.objects.update(
+            posts_count=7, followers_count=7, following_count=7
+        )
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.counts(), expected)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
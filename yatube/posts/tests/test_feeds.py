@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..feeds import HeapMergePaginator
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedEnginesTests(TestCase):
+    """Тесты движков ленты подписок."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        for number in range(25):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.authors[number % 2 + (number % 5 == 0)],
+            )
+        Post.objects.create(text='Чужой пост', author=cls.stranger)
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.expected = list(
+            Post.objects.filter(author__in=cls.authors)
+            .order_by('-pub_date', '-pk')
+        )
+
+    def walk(self, paginator_factory):
+        posts, cursor = [], None
+        while True:
+            paginator = paginator_factory()
+            page = paginator.get_page(cursor)
+            posts.extend(page)
+            cursor = paginator.next_cursor
+            if cursor is None:
+                return posts
+
+    def test_heap_merge_walks_feed_in_order(self):
+        """Слияние курсоров выдаёт ленту целиком и по порядку."""
+        author_ids = [author.pk for author in self.authors]
+        posts = self.walk(lambda: HeapMergePaginator(author_ids, 4))
+        self.assertEqual(posts, self.expected)
+
+    def vm_steps(self, func):
+        """Шаги виртуальной машины SQLite — мера прочитанных строк."""
+        steps = [0]
+
+        def count():
+            steps[0] += 1
+
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(count, 1)
+        try:
+            func()
+        finally:
+            connection.connection.set_progress_handler(None, 1)
+        return steps[0]
+
+    def test_heap_merge_reads_only_heads(self):
+        """Страница читает головы авторов, а не все их посты."""
+        author_ids = [author.pk for author in self.authors]
+
+        def first_page():
+            list(HeapMergePaginator(author_ids, 4).get_page())
+
+        before = self.vm_steps(first_page)
+        Post.objects.bulk_create(
+            Post(text=f'Ещё пост {number}', author=self.authors[0])
+            for number in range(500)
+        )
+        self.assertLess(self.vm_steps(first_page), before * 1.5)
+
+    def test_heap_merge_without_follows(self):
+        """Пустой список авторов даёт пустую страницу."""
+        self.assertEqual(len(HeapMergePaginator([], 4).get_page()), 0)
+
+    def test_engines_render_same_first_page(self):
+        """Все движки показывают одинаковую первую страницу."""
+        client = Client()
+        client.force_login(self.reader)
+        for engine in ('timeline', 'heap', 'join'):
+            with self.subTest(engine=engine):
+                with override_settings(FOLLOW_FEED_ENGINE=engine):
+                    response = client.get(reverse('posts:follow_index'))
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    self.expected[:settings.POSTS_NUM]
+                )
@@ -1,11 +1,16 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+
+from core.images import OversizedUpload, UploadLimitHandler
 
 from ..models import Comment, Group, Post
 
@@ -85,6 +90,82 @@ class PostFormTests(TestCase):
             ).exists()
         )
 
+    @override_settings(IMAGE_MAX_EDGE=100)
+    def test_create_post_normalizes_image(self):
+        """Картинка поворачивается по EXIF, уменьшается и теряет EXIF."""
+        image = Image.new('RGB', (400, 200), 'red')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: повернуть на 90° по часовой.
+        exif[0x010F] = 'Камера'
+        content = BytesIO()
+        image.save(content, 'JPEG', exif=exif.tobytes())
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Фото с камеры',
+            'image': SimpleUploadedFile(
+                'photo.jpg', content.getvalue(), 'image/jpeg'
+            ),
+        })
+        post = Post.objects.get(text='Фото с камеры')
+        with post.image.open() as stored:
+            stored_image = Image.open(BytesIO(stored.read()))
+        self.assertEqual(stored_image.size, (50, 100))
+        self.assertNotIn('exif', stored_image.info)
+        self.assertEqual((post.image_width, post.image_height), (50, 100))
+        post.image.open()
+        self.assertEqual(
+            post.image_hash, hashlib.sha256(post.image.read()).hexdigest()
+        )
+        post.image.close()
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_create_post_rejects_huge_image(self):
+        """Слишком большая картинка отклоняется до декодирования."""
+        content = BytesIO()
+        Image.new('RGB', (20, 20)).save(content, 'PNG')
+        posts_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {
+                'text': 'Огромная картинка',
+                'image': SimpleUploadedFile(
+                    'huge.png', content.getvalue(), 'image/png'
+                ),
+            }
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большое разрешение: 20×20.'
+        )
+
+    @override_settings(IMAGE_MAX_UPLOAD_BYTES=1024)
+    def test_create_post_rejects_large_upload(self):
+        """Загрузка больше лимита обрывается и выводится ошибкой поля."""
+        posts_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {
+                'text': 'Большой файл',
+                'image': SimpleUploadedFile(
+                    'big.gif', b'GIF89a' + bytes(2048), 'image/gif'
+                ),
+            }
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Файл слишком большой: не более 1,0\xa0КБ.'
+        )
+
+    @override_settings(IMAGE_MAX_UPLOAD_BYTES=1024)
+    def test_upload_limit_handler_drops_extra_bytes(self):
+        """Байты сверх лимита не передаются следующим обработчикам."""
+        handler = UploadLimitHandler()
+        handler.new_file('image', 'big.gif', 'image/gif', None)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 1000, 0),
+                         b'x' * 1000)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 1000, 1000))
+        upload = handler.file_complete(2000)
+        self.assertIsInstance(upload, OversizedUpload)
+        self.assertEqual((upload.name, upload.size), ('big.gif', 2000))
+
     def test_edit_post(self):
         """Валидная форма редактирует Post."""
         posts_count = Post.objects.count()
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import holes
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class HolesTests(TestCase):
+    """Тесты общих страниц с персональными дырами."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            text='<!--hole:header_user-->', author=cls.author
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_body_is_shared_between_users(self):
+        """Второй пользователь получает тело из кэша со своей шапкой."""
+        url = reverse('posts:index')
+        self.author_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, '<b style="color: black">reader</b>')
+        self.assertNotContains(response, '<b style="color: black">author')
+
+    def test_controls_follow_user(self):
+        """Кнопки правки поста и комментария видит только их автор."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        edit_post = reverse('posts:post_edit', args=(self.post.pk,))
+        author_page = self.author_client.get(url)
+        reader_page = self.reader_client.get(url)
+        self.assertTemplateNotUsed(reader_page, 'base.html')
+        self.assertContains(author_page, edit_post)
+        self.assertNotContains(reader_page, edit_post)
+        self.assertNotContains(author_page, 'data-action=')
+        self.assertContains(reader_page, 'data-action=')
+        self.assertContains(reader_page, 'csrfmiddlewaretoken')
+
+    def test_follow_button(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.assertContains(self.reader_client.get(url), 'Отписаться')
+        self.assertNotContains(self.author_client.get(url), 'Подписаться')
+        self.assertContains(self.client.get(url), 'Подписаться')
+
+    def test_user_text_is_not_a_hole(self):
+        """Текст поста экранируется и не превращается в дыру."""
+        response = self.author_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertContains(response, '&lt;!--hole:header_user--&gt;')
+
+    def test_placeholder_validation(self):
+        with self.assertRaises(ValueError):
+            holes.placeholder('unknown')
+        with self.assertRaises(ValueError):
+            holes.placeholder('switcher', 'a:b')
@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+from core.timing import TimedCache
+
+from ..models import Post
+
+User = get_user_model()
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    """Тесты эндпоинта /metrics."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        os.makedirs(METRICS_DIR)
+        registry.reset()
+        self.client = Client()
+
+    def metrics(self):
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_views_of_namespaces(self):
+        """Учитываются view posts, users и about, но не api."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        self.client.get(reverse('users:signup'))
+        self.client.get(reverse('api:posts'))
+        text = self.metrics()
+        for view in ('posts:index', 'about:author', 'users:signup'):
+            with self.subTest(view=view):
+                self.assertIn(
+                    'yatube_requests_total{method="GET",status="200",'
+                    f'view="{view}"}} 1', text
+                )
+                self.assertIn(
+                    'yatube_request_duration_seconds_count'
+                    f'{{view="{view}"}} 1', text
+                )
+        self.assertNotIn('api:', text)
+        self.assertIn(
+            'yatube_request_db_queries_bucket{le="+Inf",view="posts:index"} 1',
+            text
+        )
+        self.assertIn('yatube_cache_hit_ratio{cache="fragment"}', text)
+
+    def test_processes_are_summed(self):
+        """Счётчики из файлов других процессов складываются."""
+        self.client.get(reverse('posts:index'))
+        labels = [
+            ['method', 'GET'], ['status', '200'], ['view', 'posts:index']
+        ]
+        with open(os.path.join(METRICS_DIR, 'metrics-1.json'), 'w') as file_:
+            json.dump({
+                'counters': [['yatube_requests_total', labels, 2]],
+                'histograms': [],
+            }, file_)
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 3', self.metrics()
+        )
+
+    def test_dead_processes_are_retired(self):
+        """Файл завершившегося процесса переносится в retired."""
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        labels = [
+            ['method', 'GET'], ['status', '200'], ['view', 'posts:detail']
+        ]
+        for name in (f'metrics-{process.pid}.json', 'metrics-retired.json'):
+            with open(os.path.join(METRICS_DIR, name), 'w') as file_:
+                json.dump({
+                    'counters': [['yatube_requests_total', labels, 2]],
+                    'histograms': [],
+                }, file_)
+        expected = (
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:detail"} 4'
+        )
+        self.assertIn(expected, self.metrics())
+        self.assertFalse(os.path.exists(
+            os.path.join(METRICS_DIR, f'metrics-{process.pid}.json')
+        ))
+        self.assertIn(expected, self.metrics())
+
+    def test_cache_requests_with_any_backend(self):
+        """Попадания в кэш считаются и с общим кэшем, не только LocMemCache."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared = TimedCache(location, {
+            'TIMED_BACKEND':
+                'django.core.cache.backends.filebased.FileBasedCache',
+        })
+        shared.get('pages:test')
+        shared.set('pages:test', 1)
+        shared.get('pages:test')
+        text = self.metrics()
+        for result in ('hit', 'miss'):
+            with self.subTest(result=result):
+                self.assertIn(
+                    'yatube_cache_requests_total'
+                    f'{{cache="page",result="{result}"}} 1', text
+                )
+
+    def test_token_required(self):
+        """Без верного токена эндпоинт не виден и с 127.0.0.1."""
+        for header in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    reverse('metrics'), REMOTE_ADDR='127.0.0.1', **header
+                )
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_disabled_without_token(self):
+        """Без METRICS_TOKEN эндпоинт выключен."""
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer None'
+        )
+        self.assertEqual(response.status_code, 404)
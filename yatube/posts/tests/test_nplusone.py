@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import nplusone
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+def without_select_related(queryset, *fields):
+    return queryset
+
+
+@override_settings(NPLUSONE_DETECT=True, NPLUSONE_THRESHOLD=2)
+class NPlusOneTests(TestCase):
+    """Тесты поиска повторных ленивых загрузок."""
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            author = User.objects.create_user(username=f'author-{number}')
+            post = Post.objects.create(text=f'Пост {number}', author=author)
+            Comment.objects.create(post=post, author=author, text='Ок')
+        nplusone.install()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lazy_loads_are_counted(self):
+        """Повторная загрузка поля видна, select_related её убирает."""
+        with nplusone.collect() as loads:
+            [comment.post.author for comment in Comment.objects.all()]
+        found = {
+            (model, field): count
+            for model, field, _, count in nplusone.problems(loads)
+        }
+        self.assertEqual(
+            found, {('posts.Comment', 'post'): 3, ('posts.Post', 'author'): 3}
+        )
+        with nplusone.collect() as loads:
+            [
+                comment.post.author for comment in
+                Comment.objects.select_related('post__author')
+            ]
+        self.assertEqual(nplusone.problems(loads), [])
+
+    def test_reverse_one_to_one(self):
+        """Обратная связь один к одному тоже учитывается."""
+        with nplusone.collect() as loads:
+            [user.profile for user in User.objects.all()]
+        self.assertEqual(
+            [problem[:2] for problem in nplusone.problems(loads)],
+            [('auth.User', 'profile')]
+        )
+
+    def test_feed_has_no_n_plus_one(self):
+        """Лента с select_related проходит без предупреждений."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.nplusone', 'WARNING'):
+                Client().get(reverse('posts:index'))
+
+    @override_settings(NPLUSONE_RAISE=True)
+    def test_middleware_reports_template_line(self):
+        """Без select_related падает со строкой шаблона в сообщении."""
+        with mock.patch.object(
+            QuerySet, 'select_related', without_select_related
+        ):
+            with self.assertRaisesMessage(
+                nplusone.NPlusOneError,
+                'posts.Post.author: 3 раз, posts/includes/post.html:'
+            ):
+                Client().get(reverse('posts:index'))
@@ -0,0 +1,128 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.models import Profile
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    """Тесты кэша целых страниц для гостей."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.pages = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_posts', args=(cls.group.slug,)),
+            'other_group': reverse(
+                'posts:group_posts', args=(cls.other_group.slug,)
+            ),
+            'profile': reverse('posts:profile', args=(cls.author.username,)),
+            'detail': reverse('posts:post_detail', args=(cls.post.pk,)),
+        }
+
+    def setUp(self):
+        cache.clear()
+        for url in self.pages.values():
+            self.client.get(url)
+
+    def cached(self):
+        """Какие страницы сейчас отдаются из кэша."""
+        return {
+            name for name, url in self.pages.items()
+            if self.client.get(url)['X-Page-Cache'] == 'hit'
+        }
+
+    def test_hits_skip_database(self):
+        for url in self.pages.values():
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_hit_revalidates(self):
+        etag = self.client.get(self.pages['index'])['ETag']
+        response = self.client.get(
+            self.pages['index'], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_logged_in_and_unknown_params_bypass_cache(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(self.pages['index'])
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, self.author.username)
+        response = self.client.get(self.pages['index'], {'utm': 'x'})
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_post_edit_purges_its_pages(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.cached(), {'other_group'})
+        self.assertContains(self.client.get(self.pages['index']), 'Новый')
+
+    def test_comment_purges_detail(self):
+        Comment.objects.create(post=self.post, author=self.author, text='Ок')
+        self.assertEqual(
+            self.cached(), {'index', 'group', 'other_group', 'profile'}
+        )
+
+    def test_group_and_profile_changes(self):
+        """Правка группы, профиля и имени автора сбрасывают страницы с ними.
+
+        cached() заново кэширует промахи, поэтому каждая проверка
+        видит только результат последнего изменения.
+        """
+        Group.objects.get(pk=self.other_group.pk).save()
+        self.assertEqual(
+            self.cached(), {'index', 'group', 'profile', 'detail'}
+        )
+        Profile.objects.get(user=self.author).save()
+        self.assertEqual(self.cached(), {'other_group'})
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Лев'
+        author.save()
+        self.assertEqual(self.cached(), {'other_group'})
+
+    def test_process_local_cache_expires(self):
+        """Правка из другого процесса видна через FRAGMENT_LOCAL_TIMEOUT.
+
+        update() не шлёт сигналов, как и правка в другом воркере
+        с LocMemCache: поколения здесь не сдвигаются.
+        """
+        Post.objects.filter(pk=self.post.pk).update(text='Изменён')
+        self.assertIn('detail', self.cached())
+        later = time.time() + settings.FRAGMENT_LOCAL_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            response = self.client.get(self.pages['detail'])
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Изменён')
+
+    def test_deploy_check_warns_about_local_cache(self):
+        ids = [
+            message.id for message in run_checks(
+                include_deployment_checks=True
+            )
+        ]
+        self.assertIn('posts.W001', ids)
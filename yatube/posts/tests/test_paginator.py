@@ -2,7 +2,7 @@ from math import ceil
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post
@@ -33,8 +33,53 @@ class PaginatorTests(TestCase):
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
+    def test_cursor_paginator(self):
+        """Курсорный паджинатор листает ленту без пропусков и повторов."""
+        test_pages = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        for test_page in test_pages:
+            with self.subTest(test_page=test_page):
+                response_first_page = self.authorized_client.get(test_page)
+                first_page = response_first_page.context['page_obj']
+                self.assertEqual(len(first_page), settings.POSTS_NUM)
+                self.assertIsNone(first_page.paginator.previous_cursor)
+                response_last_page = self.authorized_client.get(
+                    test_page,
+                    {'cursor': first_page.paginator.next_cursor}
+                )
+                last_page = response_last_page.context['page_obj']
+                self.assertEqual(
+                    len(last_page),
+                    self.NUM_OF_TEST_POSTS - settings.POSTS_NUM
+                )
+                self.assertIsNone(last_page.paginator.next_cursor)
+                self.assertFalse(
+                    set(first_page.object_list) & set(last_page.object_list)
+                )
+                response_back = self.authorized_client.get(
+                    test_page,
+                    {'cursor': last_page.paginator.previous_cursor}
+                )
+                self.assertEqual(
+                    list(response_back.context['page_obj']),
+                    list(first_page)
+                )
+
+    def test_broken_cursor_shows_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_NUM
+        )
+
+    @override_settings(POSTS_PAGINATION='pages')
     def test_paginator(self):
-        """Модуль паджинатор работает корректно."""
+        """Нумерованный паджинатор работает корректно."""
         num_of_last_page = ceil(self.NUM_OF_TEST_POSTS / settings.POSTS_NUM)
         test_pages = (
             reverse('posts:index'),
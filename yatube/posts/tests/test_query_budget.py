@@ -0,0 +1,216 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.queries import QueryLog
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Размеры страниц, при которых число запросов должно совпадать.
+SIZES = (2, 10)
+NAMESPACES = ('posts', 'users', 'about')
+
+# Бюджет запросов маршрута для гостя и для вошедшего пользователя.
+BUDGETS = {
+    'posts:index': {'guest': 2, 'reader': 4},
+    'posts:search': {'guest': 3},
+    'posts:group_posts': {'guest': 3, 'reader': 5},
+    'posts:profile': {'guest': 4, 'reader': 7},
+    'posts:post_detail': {'guest': 4, 'reader': 6},
+    'posts:post_comments': {'guest': 2},
+    'posts:post_create': {'reader': 9},
+    'posts:post_edit': {'reader': 4},
+    'posts:post_del': {'reader': 11},
+    'posts:add_comment': {'reader': 7},
+    'posts:edit_comment': {'reader': 5},
+    'posts:del_comment': {'reader': 8},
+    'posts:follow_index': {'reader': 4},
+    'posts:profile_follow': {'reader': 13},
+    'posts:profile_unfollow': {'reader': 9},
+    'users:signup': {'guest': 0},
+    'users:login': {'guest': 0},
+    'users:logout': {'reader': 4},
+    'users:password_change_form': {'reader': 2},
+    'users:password_change_done': {'reader': 2},
+    'users:password_reset_form': {'guest': 0},
+    'users:password_reset_done': {'guest': 0},
+    'users:password_reset_confirm': {'guest': 5},
+    'users:password_reset_complete': {'guest': 0},
+    'users:profile_edit': {'reader': 3},
+    'about:author': {'guest': 0},
+    'about:tech': {'guest': 0},
+}
+
+
+@override_settings(POSTS_PAGINATION='cursor')
+class QueryBudgetTests(TestCase):
+    """Число запросов маршрутов не зависит от размера страницы."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='Описание'
+            )
+            for number in range(2)
+        ]
+        cls.group = groups[0]
+        authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(3)
+        ]
+        cls.author = authors[0]
+        for number in range(36):
+            cls.post = Post.objects.create(
+                text=f'Пост номер {number}',
+                author=authors[number % len(authors)],
+                group=groups[number % 2] if number % 3 else None,
+                image=f'posts/{number}.gif' if number % 2 else '',
+            )
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        commenters = [cls.reader, *authors]
+        for number in range(25):
+            Comment.objects.create(
+                post=cls.post, author=commenters[number % len(commenters)],
+                text=f'Комментарий {number}'
+            )
+        cls.comment = Comment.objects.filter(author=cls.reader).first()
+
+    def client_for(self, role):
+        client = Client()
+        if role == 'reader':
+            client.force_login(self.reader)
+        return client
+
+    def fresh_author(self, size):
+        author = User.objects.create_user(
+            username=f'fresh-{User.objects.count()}'
+        )
+        for number in range(size):
+            Post.objects.create(text=f'Пост {number}', author=author)
+        return author
+
+    def followed_author(self, size):
+        author = self.fresh_author(size)
+        Follow.objects.create(user=self.reader, author=author)
+        return author
+
+    def with_followers(self, size):
+        """Подписчики читателя: публикация не должна зависеть от их числа."""
+        for _ in range(size):
+            Follow.objects.create(
+                user=User.objects.create_user(
+                    username=f'fresh-{User.objects.count()}'
+                ),
+                author=self.reader,
+            )
+        return {}
+
+    def fresh_post(self, size):
+        post = Post.objects.create(text='Удаляемый пост', author=self.reader)
+        for number in range(size):
+            Comment.objects.create(
+                post=post, author=self.author, text=f'Комментарий {number}'
+            )
+        return post
+
+    def request_for(self, name, size):
+        """Метод, адрес и данные запроса; объекты растут вместе с size."""
+        post = {'post_id': self.post.pk}
+        builders = {
+            'posts:search': lambda: ({}, {'q': 'пост'}),
+            'posts:group_posts': lambda: ({'slug': self.group.slug}, None),
+            'posts:profile': lambda: (
+                {'username': self.author.username}, None
+            ),
+            'posts:post_detail': lambda: (post, None),
+            'posts:post_comments': lambda: (post, None),
+            'posts:post_create': lambda: (
+                self.with_followers(size), {'text': 'Новый пост'}
+            ),
+            'posts:post_edit': lambda: (
+                {'post_id': self.fresh_post(0).pk}, None
+            ),
+            'posts:post_del': lambda: (
+                {'post_id': self.fresh_post(size).pk}, None
+            ),
+            'posts:add_comment': lambda: (post, {'text': 'Комментарий'}),
+            'posts:edit_comment': lambda: (
+                {'comment_id': self.comment.pk}, None
+            ),
+            'posts:del_comment': lambda: ({
+                'comment_id': Comment.objects.create(
+                    post=self.post, author=self.reader, text='Удаляемый'
+                ).pk
+            }, None),
+            'posts:profile_follow': lambda: (
+                {'username': self.fresh_author(size).username}, None
+            ),
+            'posts:profile_unfollow': lambda: (
+                {'username': self.followed_author(size).username}, None
+            ),
+            'users:password_reset_confirm': lambda: ({
+                'uidb64': urlsafe_base64_encode(force_bytes(self.reader.pk)),
+                'token': default_token_generator.make_token(self.reader),
+            }, None),
+        }
+        kwargs, data = builders.get(name, lambda: ({}, None))()
+        method = 'post' if data and name != 'posts:search' else 'get'
+        return method, reverse(name, kwargs=kwargs), data
+
+    def measure(self, name, role, size):
+        with override_settings(
+            POSTS_NUM=size, COMMENTS_NUM=size
+        ), transaction.atomic():
+            cache.clear()
+            client = self.client_for(role)
+            method, url, data = self.request_for(name, size)
+            with QueryLog() as log:
+                response = getattr(client, method)(url, data)
+        self.assertLess(response.status_code, 400, f'{name}: {url}')
+        return log
+
+    def test_routes_have_budgets(self):
+        """У каждого именованного маршрута posts, users и about есть бюджет."""
+        resolver = get_resolver()
+        routes = set()
+        for namespace in NAMESPACES:
+            _, namespace_resolver = resolver.namespace_dict[namespace]
+            routes.update(
+                f'{namespace}:{name}'
+                for name in namespace_resolver.reverse_dict
+                if isinstance(name, str)
+            )
+        self.assertEqual(routes, set(BUDGETS))
+
+    def test_query_budgets(self):
+        """Запросов не больше бюджета и столько же на большой странице."""
+        for name, roles in BUDGETS.items():
+            for role, budget in roles.items():
+                with self.subTest(route=name, role=role):
+                    small, large = (
+                        self.measure(name, role, size) for size in SIZES
+                    )
+                    self.assertLessEqual(
+                        len(large), budget,
+                        f'{name}: {len(large)} запросов при бюджете '
+                        f'{budget}:\n{large.report()}'
+                    )
+                    extra = large.origins() - small.origins()
+                    self.assertEqual(
+                        len(small), len(large),
+                        f'{name}: число запросов растёт с размером '
+                        'страницы, лишние:\n' + '\n'.join(
+                            f'  {origin or "?"}: +{count}'
+                            for origin, count in extra.items()
+                        )
+                    )
@@ -0,0 +1,88 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\S+)(?: AS \S+)?$')
+TEMP_B_TREE = 'USE TEMP B-TREE'
+
+
+@override_settings(POSTS_PAGINATION='cursor')
+class QueryPlansTests(TestCase):
+    """Запросы view-функций обходятся индексами без сортировок."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            cls.post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Комментарий'
+            )
+
+    def assertIndexedPlan(self, sql):
+        tables = connection.introspection.table_names()
+        for line in self.plan(sql):
+            with self.subTest(sql=sql, plan=line):
+                self.assertNotIn(TEMP_B_TREE, line)
+                full_scan = FULL_SCAN.search(line)
+                self.assertFalse(full_scan and full_scan.group(1) in tables)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def view_queries(self, url, data=None):
+        client = Client()
+        client.force_login(self.reader)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+
+    def test_view_queries_use_indexes(self):
+        """В планах запросов нет полных сканов и временных B-деревьев."""
+        first_page = Client()
+        first_page.force_login(self.reader)
+        cursor = first_page.get(
+            reverse('posts:index')
+        ).context['page_obj'].paginator.next_cursor
+        urls = (
+            (reverse('posts:index'), None),
+            (reverse('posts:index'), {'cursor': cursor}),
+            (reverse('posts:group_posts', args=(self.group.slug,)), None),
+            (reverse('posts:profile', args=(self.author.username,)), None),
+            (reverse('posts:post_detail', args=(self.post.pk,)), None),
+            (reverse('posts:post_comments', args=(self.post.pk,)), None),
+        )
+        for url, data in urls:
+            for sql in self.view_queries(url, data):
+                self.assertIndexedPlan(sql)
+
+    def test_follow_feed_engines_use_indexes(self):
+        """Материализованная лента и слияние курсоров обходятся индексами.
+
+        Движок 'join' оставлен как исходный запрос для сравнения
+        и сортирует результат JOIN во временном B-дереве.
+        """
+        for engine in ('timeline', 'heap'):
+            with override_settings(FOLLOW_FEED_ENGINE=engine):
+                for sql in self.view_queries(reverse('posts:follow_index')):
+                    self.assertIndexedPlan(sql)
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from core import replay
+from core.management.commands.replay import saturation
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+LOG = (
+    '10.0.0.1 - - [18/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 512 '
+    '"-" "Mozilla"\n'
+    '10.0.0.2 - reader [18/Oct/2026:10:00:01 +0000] '
+    '"POST /posts/{post}/comment/ HTTP/1.1" 302 0\n'
+    '10.0.0.2 - reader [18/Oct/2026:10:00:02 +0000] '
+    '"GET /follow/ HTTP/1.1" 200 1024\n'
+    '10.0.0.1 - - [18/Oct/2026:10:00:03 +0000] '
+    '"GET /posts/{post}/ HTTP/1.1" 200 2048 "-" "Mozilla"\n'
+    '10.0.0.1 - - [18/Oct/2026:10:00:04 +0000] '
+    '"GET /static/css/bootstrap.min.css HTTP/1.1" 200 9000 "-" "Mozilla"\n'
+    'мусор\n'
+)
+
+
+class ReplayStatsTests(SimpleTestCase):
+    def test_parse_log(self):
+        entries = list(replay.parse_log(LOG.format(post=1).splitlines()))
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(entries[0]['client'], '10.0.0.1 Mozilla')
+        self.assertIsNone(entries[0]['user'])
+        self.assertEqual(entries[1]['client'], 'reader')
+        self.assertEqual(entries[1]['method'], 'POST')
+        self.assertEqual(entries[1]['path'], '/posts/1/comment/')
+
+    def test_split_keeps_client_together(self):
+        entries = [{'client': str(i % 5)} for i in range(50)]
+        shares = replay.split(entries, 3)
+        self.assertEqual(sum(len(share) for share in shares), 50)
+        for share in shares:
+            clients = {entry['client'] for entry in share}
+            for other in shares:
+                if other is not share:
+                    self.assertFalse(
+                        clients & {entry['client'] for entry in other}
+                    )
+
+    def test_summarize(self):
+        records = [('posts:index', False, 0.01 * i) for i in range(1, 11)]
+        records += [('posts:search', True, 0.5), ('posts:search', True, 1.0)]
+        summary = replay.summarize(records, 2)
+        self.assertEqual(summary['posts:index']['p50_ms'], 50)
+        self.assertEqual(summary['posts:index']['rps'], 5)
+        self.assertEqual(summary['posts:index']['error_rate'], 0)
+        self.assertEqual(summary['posts:search']['error_rate'], 1)
+        self.assertEqual(summary['*']['requests'], 12)
+        self.assertEqual(replay.summarize([], 2), {})
+
+    def test_failed(self):
+        """Ошибки: нет ответа, 4xx/5xx и переадресация на вход."""
+        def response(status, location=None):
+            result = requests.Response()
+            result.status_code = status
+            if location is not None:
+                result.headers['Location'] = location
+            return result
+
+        self.assertTrue(replay.failed(None))
+        self.assertTrue(replay.failed(response(500)))
+        self.assertTrue(replay.failed(
+            response(302, '/auth/login/?next=/follow/')
+        ))
+        self.assertFalse(replay.failed(response(200)))
+        self.assertFalse(replay.failed(response(302, '/posts/1/')))
+
+    def test_saturation(self):
+        rounds = [
+            {'workers': 1, 'rps': 100},
+            {'workers': 2, 'rps': 190},
+            {'workers': 4, 'rps': 200},
+        ]
+        self.assertEqual(saturation(rounds), 2)
+        self.assertIsNone(saturation(rounds[:2]))
+
+
+class ReplayCommandTests(LiveServerTestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(
+            username='reader', password='yatube-seed'
+        )
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.reader, group=self.group
+        )
+        self.path = os.path.join(tempfile.mkdtemp(), 'access.log')
+
+    def replay(self, *args):
+        out = StringIO()
+        call_command(
+            'replay', *args, '--base-url', self.live_server_url,
+            '--workers', '1,2', stdout=out
+        )
+        return out.getvalue()
+
+    def test_log(self):
+        """Журнал воспроизводится сессиями: комментарий от reader."""
+        with open(self.path, 'w', encoding='utf-8') as file_:
+            file_.write(LOG.format(post=self.post.pk))
+        output = self.replay('--log', self.path)
+        self.assertIn('Пропущено строк журнала: 1', output)
+        self.assertIn('Процессов: 2', output)
+        for view in ('posts:index', 'posts:follow_index'):
+            self.assertIn(view, output)
+        # Вход клиентов в замеры не попадает.
+        self.assertNotIn('users:login', output)
+        comments = Comment.objects.filter(post=self.post, author=self.reader)
+        self.assertEqual(comments.count(), 2)
+
+    def test_profile(self):
+        with open(self.path, 'w', encoding='utf-8') as file_:
+            json.dump({
+                'requests': 20, 'clients': 4, 'users': 0.5, 'seed': 1,
+                'guest': {'posts:index': 1, 'posts:group_posts': 1,
+                          'posts:search': 1},
+                'user': {'posts:post_detail': 1, 'posts:follow_index': 1},
+            }, file_)
+        result = self.path + '.json'
+        output = self.replay('--profile', self.path, '--output', result)
+        self.assertIn('posts:follow_index', output)
+        self.assertIn('ошибок 0.0%', output)
+        with open(result, encoding='utf-8') as file_:
+            rounds = json.load(file_)
+        self.assertEqual([item['workers'] for item in rounds], [1, 2])
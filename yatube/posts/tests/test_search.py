@@ -0,0 +1,143 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models.signals import pre_delete
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Тесты полнотекстового поиска."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.hedgehog = Post.objects.create(
+            text='Ёжики бежали по лесу', author=cls.author
+        )
+        cls.cat = Post.objects.create(
+            text='Кошка спит на диване', author=cls.author
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.cat, author=cls.author, text='Видел ежа в парке'
+        )
+
+    def found(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_word_forms_and_yo(self):
+        """Находятся другие формы слова, «ё» и «е» не различаются."""
+        self.assertEqual(self.found('ежик'), [self.hedgehog])
+        self.assertEqual(self.found('БЕГУТ ЁЖИКИ'), [])
+        self.assertEqual(self.found('бежал ёжик'), [self.hedgehog])
+        self.assertEqual(self.found('кошки'), [self.cat])
+
+    def test_comments_lead_to_post(self):
+        """Совпадение в комментарии выводит его пост."""
+        self.assertEqual(self.found('парк'), [self.cat])
+
+    def test_index_follows_changes(self):
+        """Правка и удаление поста и комментария обновляют индекс."""
+        hedgehog = Post.objects.get(pk=self.hedgehog.pk)
+        hedgehog.text = 'Белки прыгали'
+        hedgehog.save()
+        self.assertEqual(self.found('ежик'), [])
+        self.assertEqual(self.found('белка'), [hedgehog])
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(self.found('парк'), [])
+        Post.objects.get(pk=self.cat.pk).delete()
+        self.assertEqual(self.found('кошка'), [])
+
+    def test_post_comments_are_unindexed_by_post(self):
+        """Комментарии поста убираются из индекса одним запросом."""
+        for number in range(5):
+            Comment.objects.create(
+                post=self.cat, author=self.author, text=f'Хвост {number}'
+            )
+        with CaptureQueriesContext(connection) as context:
+            Post.objects.get(pk=self.cat.pk).delete()
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if search.TABLE in query['sql']
+        ]
+        self.assertEqual(queries, [
+            f'DELETE FROM {search.TABLE} WHERE post_id = {self.cat.pk}'
+        ])
+        self.assertEqual(self.found('парк'), [])
+        self.assertEqual(self.found('хвост'), [])
+
+    def test_failed_post_delete_keeps_comment_signals(self):
+        """Неудавшееся удаление поста не глушит удаление комментария."""
+        def fail(sender, **kwargs):
+            raise DatabaseError('Сбой удаления')
+
+        pre_delete.connect(fail, sender=Comment)
+        try:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                Post.objects.get(pk=self.cat.pk).delete()
+        finally:
+            pre_delete.disconnect(fail, sender=Comment)
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(self.found('парк'), [])
+        self.assertEqual(
+            Post.objects.get(pk=self.cat.pk).comments_count, 0
+        )
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы FTS5 в запросе не ломают поиск."""
+        for query in ('"', 'NEAR(', '*', 'ежик OR', '-кошка', ''):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('posts:search'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(POSTS_NUM=2)
+    def test_cursor_pagination(self):
+        """Курсор проходит все результаты по рангу без повторов."""
+        posts = {self.hedgehog.pk}
+        for number in range(4):
+            posts.add(Post.objects.create(
+                text=f'Ёж номер {number}', author=self.author
+            ).pk)
+        seen, cursor = [], None
+        while True:
+            params = {'q': 'еж'}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(reverse('posts:search'), params)
+            seen += [post.pk for post in response.context['page_obj']]
+            cursor = response.context['page_obj'].paginator.next_cursor
+            if cursor is None:
+                break
+            self.assertContains(response, 'q=%D0%B5%D0%B6&amp;cursor=')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertTrue(posts <= set(seen))
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по формам слов."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ёжиков'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.hedgehog]
+        )
+
+    def test_rebuild_command(self):
+        search.clear()
+        self.assertEqual(self.found('ежик'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('ежик'), [self.hedgehog])
+        self.assertEqual(self.found('парк'), [self.cat])
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from users.models import Profile
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+VOLUMES = {
+    'users': 30, 'groups': 4, 'posts': 200, 'comments': 300, 'follows': 60,
+    'batch_size': 50,
+}
+
+
+def seed(**options):
+    call_command('seed', stdout=StringIO(), **{**VOLUMES, **options})
+
+
+def snapshot():
+    return list(Post.objects.order_by('pk').values_list(
+        'author__username', 'group__slug', 'text', 'pub_date',
+        'comments_count',
+    ))
+
+
+class SeedCommandTests(TestCase):
+    """Тесты генератора синтетических данных."""
+    def test_volumes_and_counters(self):
+        """Создаётся заданный объём, счётчики сходятся с данными."""
+        seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Profile.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertEqual(Follow.objects.count(), 60)
+        for post in Post.objects.annotate(actual=Count('comments')):
+            self.assertEqual(post.comments_count, post.actual)
+        for profile in Profile.objects.select_related('user'):
+            with self.subTest(user=profile.user.username):
+                self.assertEqual(
+                    profile.posts_count, profile.user.posts.count()
+                )
+                self.assertEqual(
+                    profile.followers_count, profile.user.following.count()
+                )
+        self.assertFalse(
+            Comment.objects.filter(created__lt=F('post__pub_date')).exists()
+        )
+
+    def test_same_seed_same_data(self):
+        """Одно зерно даёт те же данные, другое — другие."""
+        seed(seed=7)
+        first = snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seed(seed=7)
+        self.assertEqual(snapshot(), first)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seed(seed=8)
+        self.assertNotEqual(snapshot(), first)
+
+    def test_popularity_is_skewed(self):
+        """Популярность авторов степенная: лидер далеко впереди."""
+        seed(posts=2000, comments=0)
+        counts = sorted(
+            Profile.objects.values_list('posts_count', flat=True),
+            reverse=True
+        )
+        self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import slow_queries
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG_INTERVAL=60)
+class SlowQueryLogTests(TestCase):
+    """Тесты журнала медленных запросов."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        slow_queries._seen.clear()
+        self.client = Client()
+
+    def entries(self, url):
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_entry_has_view_and_plan(self):
+        """В записи есть view, параметры и план запроса."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        entries = self.entries(url)
+        post_query = next(
+            entry for entry in entries
+            if 'FROM "posts_post"' in entry['sql']
+        )
+        self.assertEqual(post_query['view'], 'posts:post_detail')
+        self.assertIn(self.post.pk, post_query['params'])
+        self.assertTrue(post_query['plan'])
+
+    def test_repeats_are_rate_limited(self):
+        """Повтор запроса не пишется, а учитывается в следующей записи."""
+        # Поиск не кэшируется и выполняет запросы при каждом обращении.
+        url = reverse('posts:search') + '?q=пост'
+        first = {entry['fingerprint'] for entry in self.entries(url)}
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            # assertLogs требует хотя бы одной записи.
+            slow_queries.logger.warning('{}')
+            self.client.get(url)
+        repeated = [
+            json.loads(record.getMessage())['fingerprint']
+            for record in logs.records[1:]
+        ]
+        self.assertFalse(first & set(repeated))
+        with override_settings(SLOW_QUERY_LOG_INTERVAL=0):
+            entries = self.entries(url)
+        self.assertTrue(any(entry['suppressed'] for entry in entries))
+
+    def test_summary_command(self):
+        """Команда выводит худшие запросы первыми."""
+        entries = [
+            {'fingerprint': 'fast', 'view': 'posts:index', 'path': '/',
+             'duration_ms': 150, 'suppressed': 0, 'suppressed_ms': 0,
+             'sql': 'SELECT 1', 'plan': None},
+            {'fingerprint': 'slow', 'view': 'posts:profile', 'path': '/p/',
+             'duration_ms': 400, 'suppressed': 2, 'suppressed_ms': 700,
+             'sql': 'SELECT 2', 'plan': ['SCAN posts_post']},
+        ]
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.log', delete=False
+        ) as file_:
+            file_.write('\n'.join(json.dumps(entry) for entry in entries))
+        self.addCleanup(os.remove, file_.name)
+        out = StringIO()
+        call_command('slow_queries', log=file_.name, stdout=out)
+        output = out.getvalue()
+        self.assertLess(output.index('slow: 3 раз'), output.index('fast'))
+        self.assertIn('SCAN posts_post', output)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+
+from core.sqlite import pragma
+
+
+class SQLiteTests(TestCase):
+    """Тесты прагм соединений SQLite."""
+    def file_connection(self):
+        """Новое соединение с файлом: у тестовой базы в памяти нет WAL."""
+        path = os.path.join(tempfile.mkdtemp(), 'db.sqlite3')
+        wrapper = type(connections['default'])(
+            {**connection.settings_dict, 'NAME': path}, alias='file'
+        )
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_pragmas(self):
+        raw = self.file_connection().connection
+        self.assertEqual(pragma(raw, 'journal_mode'), 'wal')
+        self.assertEqual(pragma(raw, 'busy_timeout'), 5000)
+        self.assertEqual(pragma(raw, 'synchronous'), 1)
+        self.assertEqual(pragma(raw, 'temp_store'), 2)
+        self.assertEqual(pragma(raw, 'cache_size'), -64 * 1024)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 100})
+    def test_settings(self):
+        raw = self.file_connection().connection
+        self.assertEqual(pragma(raw, 'busy_timeout'), 100)
+        self.assertEqual(pragma(raw, 'journal_mode'), 'delete')
+
+    def test_invalid_value(self):
+        with self.assertRaises(ValueError):
+            pragma(connection.connection, 'cache_size', '1; DROP TABLE x')
+
+    def test_status_command(self):
+        out = StringIO()
+        with mock.patch(
+            'core.management.commands.sqlite_status.connections',
+            {'file': self.file_connection()},
+        ):
+            call_command('sqlite_status', '--database', 'file', stdout=out)
+        output = out.getvalue()
+        self.assertIn('busy_timeout        5000', output)
+        self.assertIn('page_size', output)
+        self.assertIn('Контрольная точка passive', output)
+
+    def test_status_command_memory(self):
+        out = StringIO()
+        call_command('sqlite_status', stdout=out)
+        self.assertIn('Журнал WAL не используется', out.getvalue())
@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from core import thumbnails
+
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+PLACEHOLDER = 'Изображение обрабатывается'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTests(TransactionTestCase):
+    """Тесты предварительного создания миниатюр."""
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_post_create_pregenerates_thumbnail(self):
+        """Миниатюра создаётся при публикации, страница её не ждёт."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        post = Post.objects.get()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, '<img class="card-img my-2"')
+
+    def test_stored_size_spares_reopening_original(self):
+        """Размеры исходника берутся из модели, а не из файла."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (1, 1))
+        # Миниатюра на диске есть, а kvstore о ней забыл.
+        default.kvstore.clear()
+        opened = []
+        get_image = default.engine.get_image
+
+        def recording(source):
+            opened.append(source.name)
+            return get_image(source)
+
+        with mock.patch.object(default.engine, 'get_image', recording):
+            thumbnails.schedule(post.image, 'post')
+        self.assertNotIn(post.image.name, opened)
+        self.assertIsNotNone(thumbnails.lookup(post.image, 'post'))
+
+    def test_missing_thumbnail_renders_placeholder(self):
+        """Без готовой миниатюры выводится заглушка, затем картинка."""
+        post = Post.objects.create(
+            text='Пост',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, PLACEHOLDER)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, post.text)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailBatchTests(TestCase):
+    """Миниатюры страницы читаются из kvstore одним запросом."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.user,
+                image=SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, 'image/gif'
+                ),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def kvstore_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return [
+            query for query in context.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+
+    def test_feed_thumbnails_are_fetched_in_one_query(self):
+        """Лента и профиль читают kvstore один раз на страницу."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(len(self.kvstore_queries(url)), 1)
+
+    def test_cached_fragment_skips_kvstore(self):
+        """Страница из кэша фрагментов не обращается к kvstore."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.assertEqual(self.kvstore_queries(url), [])
@@ -0,0 +1,140 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from users.models import Profile
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    """Тесты материализованной ленты подписок."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def timeline_posts(self):
+        return list(
+            TimelineEntry.objects.filter(user=self.reader)
+            .values_list('post_id', flat=True)
+        )
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.timeline_posts(), [self.old_post.pk])
+        follow.delete()
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            self.timeline_posts(), [new_post.pk, self.old_post.pk]
+        )
+        new_post.delete()
+        self.assertEqual(self.timeline_posts(), [self.old_post.pk])
+
+    @override_settings(TIMELINE_LENGTH=2, TIMELINE_TRIM_SLACK=1)
+    def test_timeline_is_capped(self):
+        """Переросшая на TIMELINE_TRIM_SLACK лента обрезается до длины."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            for number in range(3)
+        ]
+        self.assertEqual(
+            self.timeline_posts(), [posts[2].pk, posts[1].pk]
+        )
+        self.reader.profile.refresh_from_db()
+        self.assertEqual(self.reader.profile.timeline_count, 2)
+
+    def vm_steps(self, func):
+        """Шаги виртуальной машины SQLite — мера прочитанных строк."""
+        steps = [0]
+
+        def count():
+            steps[0] += 1
+
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(count, 1)
+        try:
+            func()
+        finally:
+            connection.connection.set_progress_handler(None, 1)
+        return steps[0]
+
+    @override_settings(TIMELINE_LENGTH=100, TIMELINE_TRIM_SLACK=10)
+    def test_fan_out_reads_only_overgrown_timelines(self):
+        """Публикация не читает ленты подписчиков, не переросшие длину."""
+        followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(20)
+        ]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+
+        def publish():
+            Post.objects.create(text='Новый', author=self.author)
+
+        before = self.vm_steps(publish)
+        other = User.objects.create_user(username='other')
+        Post.objects.bulk_create(
+            Post(text=f'Старый {number}', author=other)
+            for number in range(100)
+        )
+        old_posts = Post.objects.filter(author=other)
+        for follower in followers:
+            TimelineEntry.objects.bulk_create(
+                TimelineEntry(
+                    user=follower, post=post, author=other,
+                    pub_date=post.pub_date,
+                )
+                for post in old_posts
+            )
+        Profile.objects.filter(user__in=followers).update(timeline_count=100)
+        self.assertLess(self.vm_steps(publish), before * 1.5)
+        # Переросшие ленты обрезаются разом и снова не читаются.
+        Profile.objects.filter(user__in=followers).update(timeline_count=200)
+        publish()
+        for follower in followers:
+            self.assertEqual(
+                TimelineEntry.objects.filter(user=follower).count(), 100
+            )
+        self.assertLess(self.vm_steps(publish), before * 1.5)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленту."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [self.old_post.pk])
+
+    @override_settings(TIMELINE_BATCH_SIZE=1)
+    def test_rebuild_command_walks_users_in_batches(self):
+        """Команда перестраивает ленты всех читателей пачками id."""
+        readers = [self.reader] + [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for reader in readers:
+            Follow.objects.create(user=reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_timelines', stdout=out)
+        self.assertIn('Перестроено лент: 4', out.getvalue())
+        for reader in readers:
+            self.assertEqual(
+                list(reader.timeline.values_list('post_id', flat=True)),
+                [self.old_post.pk]
+            )
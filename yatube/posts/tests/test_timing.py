@@ -0,0 +1,88 @@
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import timing
+
+from .. import fragments
+from ..models import Post
+
+User = get_user_model()
+
+
+class ServerTimingTests(TestCase):
+    """Тесты замеров Server-Timing."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_header_and_log_line(self):
+        """Замеренный запрос получает заголовок и строку журнала."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(url)
+        header = response['Server-Timing']
+        for metric in ('db;', 'tpl;', 'cache;', 'thumb;', 'total;'):
+            self.assertIn(metric, header)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'posts:post_detail')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['db_queries'], 0)
+        self.assertGreater(line['template_ms'], 0)
+        self.assertGreater(line['cache_misses'], 0)
+        self.assertIsNone(timing.current())
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Запрос вне выборки не замеряется."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_cache_counters(self):
+        """Попадания и промахи считаются только внутри замера."""
+        cache.get('timing-test')
+        timings = timing._state.timings = timing.Timings()
+        try:
+            cache.get('timing-test')
+            cache.set('timing-test', 1)
+            cache.get_many(['timing-test', 'timing-other'])
+        finally:
+            timing._state.timings = None
+        self.assertEqual(timings.cache_hits, 1)
+        self.assertEqual(timings.cache_misses, 2)
+
+    def test_cache_counters_with_any_backend(self):
+        """Счётчики не зависят от бэкенда под обёрткой."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        files = timing.TimedCache(location, {
+            'TIMED_BACKEND':
+                'django.core.cache.backends.filebased.FileBasedCache',
+        })
+        with mock.patch.object(
+            fragments, 'caches', {DEFAULT_CACHE_ALIAS: files}
+        ):
+            self.assertFalse(fragments.process_local())
+        self.assertTrue(fragments.process_local())
+        timings = timing._state.timings = timing.Timings()
+        try:
+            files.set('timing-test', 1)
+            files.get('timing-test')
+            files.get_or_set('timing-other', 2)
+        finally:
+            timing._state.timings = None
+        self.assertEqual(files.get('timing-other'), 2)
+        self.assertEqual(timings.cache_hits, 2)
+        self.assertEqual(timings.cache_misses, 1)
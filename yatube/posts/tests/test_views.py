@@ -60,6 +60,7 @@ class PostsViewsTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -106,13 +107,51 @@ class PostsViewsTests(TestCase):
     def test_y_cache_index_page(self):
         """Тестирование кэширования постов главной страницы."""
         response = self.authorized_client.get(reverse('posts:index'))
-        self.post.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         response2 = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response2.content)
         cache.clear()
         response3 = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, response3.content)
 
+    def test_cached_feeds_invalidated_on_write(self):
+        """Изменение поста сбрасывает только затронутые ленты."""
+        pages = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_posts', kwargs={'slug': self.group.slug}
+            ),
+            'other_group': reverse(
+                'posts:group_posts',
+                kwargs={'slug': self.group_without_post.slug}
+            ),
+        }
+        before = {
+            name: self.authorized_client.get(url).content
+            for name, url in pages.items()
+        }
+        self.post.text = 'Обновлённый текст'
+        self.post.save()
+        for name in ('index', 'group'):
+            with self.subTest(page=name):
+                response = self.authorized_client.get(pages[name])
+                self.assertNotEqual(response.content, before[name])
+                self.assertContains(response, 'Обновлённый текст')
+        response = self.authorized_client.get(pages['other_group'])
+        self.assertEqual(response.content, before['other_group'])
+
+    def test_cached_index_depends_on_page(self):
+        """Разные страницы ленты кэшируются под разными ключами."""
+        for number in range(settings.POSTS_NUM):
+            Post.objects.create(text=f'Пост {number}', author=self.user)
+        first_page = self.authorized_client.get(reverse('posts:index'))
+        cursor = first_page.context['page_obj'].paginator.next_cursor
+        second_page = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': cursor}
+        )
+        self.assertContains(second_page, 'Тестовый текст')
+        self.assertNotContains(first_page, 'Тестовый текст')
+
     def test_user_can_unfollow(self):
         """Авторизованный пользователь может отписываться."""
         response_unfollow = self.authorized_client.get(
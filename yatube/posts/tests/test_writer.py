@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, current_thread
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+
+from core import writer
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+def in_thread(func):
+    """Вызов из отдельного потока, как из потока запроса."""
+    def call(*args):
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+    return call
+
+
+@override_settings(WRITE_QUEUE=True, WRITE_QUEUE_WAIT=0.05)
+class WriteQueueTests(TransactionTestCase):
+    """Тесты очереди записи."""
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def concurrently(self, func, count):
+        with ThreadPoolExecutor(count) as pool:
+            futures = [pool.submit(in_thread(func), i) for i in range(count)]
+        return futures
+
+    def test_writes_are_batched(self):
+        """Записи потоков идут в писателе, несколькими за транзакцию."""
+        threads = set()
+
+        def comment(i):
+            Comment.objects.create(
+                post=self.post, author=self.author, text=f'Коммент {i}'
+            )
+            threads.add(current_thread().name)
+
+        with mock.patch.object(
+            writer.Writer, 'run', autospec=True, side_effect=writer.Writer.run
+        ) as run:
+            futures = self.concurrently(comment, 8)
+        for future in futures:
+            future.result()
+        self.assertEqual(self.post.comments.count(), 8)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 8)
+        self.assertLess(run.call_count, 8)
+        self.assertNotIn('writer-default', threads)
+
+    def test_errors_reach_their_caller(self):
+        """Ошибка записи достаётся её запросу, остальные фиксируются."""
+        readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(4)
+        ]
+
+        def follow(i):
+            user = readers[i] if i else self.author
+            return writer.run(
+                Follow.objects.create, user=user, author=self.author
+            )
+
+        futures = self.concurrently(follow, 4)
+        with self.assertRaises(IntegrityError):
+            futures[0].result()
+        for future in futures[1:]:
+            self.assertIsInstance(future.result(), Follow)
+        self.assertEqual(Follow.objects.count(), 3)
+
+    def test_inline_in_transaction(self):
+        """В открытой транзакции запись выполняется на месте."""
+        with transaction.atomic():
+            self.assertEqual(
+                writer.run(lambda: current_thread().name),
+                current_thread().name
+            )
+        self.assertEqual(
+            writer.run(lambda: current_thread().name), 'writer-default'
+        )
+
+    def test_timeout(self):
+        """Не начатая вовремя запись отменяется и не выполняется."""
+        started, release, done = Event(), Event(), []
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        with ThreadPoolExecutor(1) as pool:
+            blocker = pool.submit(in_thread(writer.run), block)
+            started.wait(5)
+            with self.settings(WRITE_QUEUE_TIMEOUT=0.01):
+                with self.assertRaises(writer.WriteTimeout):
+                    writer.run(done.append, True)
+            release.set()
+        blocker.result()
+        writer.run(done.append, False)
+        self.assertEqual(done, [False])
+
+    @override_settings(WRITE_QUEUE=False)
+    def test_disabled(self):
+        self.assertEqual(
+            writer.run(lambda: current_thread().name), current_thread().name
+        )
@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def _grown(user_ids, delta):
+    """Прибавляет delta к оценке длины лент пользователей user_ids."""
+    Profile.objects.filter(user_id__in=user_ids).update(
+        timeline_count=Greatest(F('timeline_count') + delta, 0)
+    )
+
+
+def trim(user_ids):
+    """Обрезает переросшие ленты до TIMELINE_LENGTH записей.
+
+    user_ids — список id или подзапрос QuerySet.values('user_id').
+    Длину ленты оценивает сверху Profile.timeline_count, поэтому
+    остальные ленты не читаются, а переросшая обрезается раз
+    в TIMELINE_TRIM_SLACK записей: по индексу (user, -pub_date, -id)
+    читаются только её строки.
+    """
+    overgrown = Profile.objects.filter(
+        user_id__in=user_ids,
+        timeline_count__gt=(
+            settings.TIMELINE_LENGTH + settings.TIMELINE_TRIM_SLACK
+        ),
+    ).values_list('user_id', flat=True)
+    table = TimelineEntry._meta.db_table
+    for user_id in list(overgrown):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE id IN ('
+                f'  SELECT id FROM {table} WHERE user_id = %s'
+                '  ORDER BY pub_date DESC, id DESC LIMIT -1 OFFSET %s'
+                ')',
+                [user_id, settings.TIMELINE_LENGTH],
+            )
+        Profile.objects.filter(user_id=user_id).update(
+            timeline_count=TimelineEntry.objects.filter(
+                user_id=user_id
+            ).count()
+        )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Вставка и оценка длины лент — по запросу на пост при любом числе
+    подписчиков; обрезаются только переросшие ленты.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR IGNORE INTO {TimelineEntry._meta.db_table} '
+            '(user_id, post_id, author_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            f'FROM {Follow._meta.db_table} AS follow '
+            f'JOIN {Post._meta.db_table} AS post '
+            'ON post.author_id = follow.author_id WHERE post.id = %s',
+            [post.pk],
+        )
+    followers = Follow.objects.filter(author_id=post.author_id).values(
+        'user_id'
+    )
+    _grown(followers, 1)
+    trim(followers)
+
+
+def sync_post(post):
+    """Обновляет денормализованные поля записей ленты после правки поста."""
+    TimelineEntry.objects.filter(post_id=post.pk).exclude(
+        author_id=post.author_id, pub_date=post.pub_date
+    ).update(author_id=post.author_id, pub_date=post.pub_date)
+
+
+def add_author(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    )[:settings.TIMELINE_LENGTH]
+    entries = TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in posts],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    _grown([user_id], len(entries))
+    trim([user_id])
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    deleted, _ = TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    _grown([user_id], -deleted)
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Строит ленту пользователя заново по его подпискам.
+
+    В транзакции: читатели видят старую ленту до фиксации новой.
+    """
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    posts = Post.objects.filter(author__following__user_id=user_id).only(
+        'pk', 'author_id', 'pub_date'
+    ).iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    batch, count = [], 0
+    for post in posts:
+        if count >= settings.TIMELINE_LENGTH:
+            break
+        batch.append(_entry(user_id, post))
+        count += 1
+        if len(batch) == settings.TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch)
+    Profile.objects.filter(user_id=user_id).update(timeline_count=count)
@@ -1,59 +1,139 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Prefetch
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core import thumbnails, writer
+
+from .conditional import conditional_page
+from .feeds import HeapMergePaginator
 from .forms import CommentForm, PostForm
+from .fragments import fragment_context
 from .models import Comment, Follow, Group, Post, User
+from .page_cache import post_tags, shared_page, tag_page
+from .paginators import CursorPaginator
+from .search import SearchPaginator
 
 
-def paginator(page_number, posts):
-    """Вспомогательная функция для паджинатора."""
-    paginator = Paginator(posts, settings.POSTS_NUM)
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+def paginator(request, posts):
+    """Вспомогательная функция для паджинатора.
+
+    По умолчанию лента листается курсором (?cursor=...), нумерованные
+    страницы (?page=N) включаются настройкой POSTS_PAGINATION = 'pages'.
+    """
+    if settings.POSTS_PAGINATION == 'pages':
+        return Paginator(posts, settings.POSTS_NUM).get_page(
+            request.GET.get('page')
+        )
+    return CursorPaginator(posts, settings.POSTS_NUM).get_page(
+        request.GET.get('cursor')
+    )
+
+
+def thumbnail_batch(page_obj, *extra):
+    """Пакетная загрузка миниатюр постов страницы и extra-пар."""
+    return thumbnails.ThumbnailBatch(
+        lambda: [(post.image, 'post') for post in page_obj] + list(extra)
+    )
+
+
+def group_scopes(slug):
+    pk = Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    return None if pk is None else (f'group:{pk}', 'authors')
+
+
+def profile_scopes(username):
+    pk = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    return None if pk is None else (f'author:{pk}', 'groups', 'authors')
 
 
+def post_scopes(post_id):
+    """Пост, комментарии и счётчик постов автора в сайдбаре."""
+    author_id = Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', flat=True).first()
+    if author_id is None:
+        return None
+    return (f'post:{post_id}', f'author:{author_id}', 'groups', 'authors')
+
+
+@conditional_page(lambda: ('index', 'groups', 'authors'))
+@shared_page
 def index(request):
     """Главная страница."""
     template = 'posts/index.html'
     posts = Post.objects.select_related('author', 'group')
+    page_obj = paginator(request, posts)
+    tag_page(request, 'index', *post_tags(page_obj))
     context = {
-        'page_obj': paginator(request.GET.get('page'), posts),
+        'page_obj': page_obj,
+        'thumbnail_batch': thumbnail_batch(page_obj),
         'title': 'Последние обновления на сайте',
+        **fragment_context(request, 'index', 'groups', 'authors'),
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    """Полнотекстовый поиск по постам и комментариям."""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = SearchPaginator(query, settings.POSTS_NUM).get_page(
+        request.GET.get('cursor')
+    )
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'thumbnail_batch': thumbnail_batch(page_obj),
+        'title': f'Поиск: {query}' if query else 'Поиск',
     }
     return render(request, template, context)
 
 
+@conditional_page(group_scopes)
+@shared_page
 def group_posts(request, slug):
     """Страница постов группы."""
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
+    page_obj = paginator(request, posts)
+    tag_page(request, f'group:{group.pk}', *post_tags(page_obj))
     context = {
         'group': group,
-        'page_obj': paginator(request.GET.get('page'), posts),
+        'page_obj': page_obj,
+        'thumbnail_batch': thumbnail_batch(page_obj),
         'title': f'Записи сообщества {group.title}',
+        **fragment_context(request, f'group:{group.pk}', 'authors'),
     }
     return render(request, template, context)
 
 
+@conditional_page(profile_scopes)
+@shared_page
 def profile(request, username):
     """Страница пользователя."""
     template = 'posts/profile.html'
     author = get_object_or_404(
         User.objects.select_related('profile'), username=username)
     posts = author.posts.select_related('group')
-    following = (
-        request.user.is_authenticated
-        and author.following.filter(user=request.user).exists()
-    )
+    page_obj = paginator(request, posts)
+    tag_page(request, f'author:{author.pk}', *post_tags(page_obj))
+    author_profile = getattr(author, 'profile', None)
     context = {
         'author': author,
-        'page_obj': paginator(request.GET.get('page'), posts),
-        'following': following,
+        'page_obj': page_obj,
+        'thumbnail_batch': thumbnail_batch(
+            page_obj,
+            (author_profile and author_profile.profile_pic, 'profile'),
+        ),
         'title': f'Профайл пользователя {author}',
+        **fragment_context(
+            request, f'author:{author.pk}', 'groups', 'authors'
+        ),
     }
     return render(request, template, context)
 
@@ -104,19 +184,73 @@ def del_comment(request, comment_id):
     return redirect('posts:post_detail', comment.post.pk)
 
 
+def comments_page(post, cursor=None):
+    """Порция комментариев поста по возрастанию (created, id)."""
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_NUM,
+        key='created',
+    ).get_page(cursor)
+
+
+@conditional_page(post_scopes, public_max_age=60)
+@shared_page
 def post_detail(request, post_id):
-    """Информация о посте."""
+    """Информация о посте.
+
+    Выводится только первая порция комментариев, остальные
+    подгружаются с post_comments.
+    """
     template = 'posts/post_detail.html'
     post = get_object_or_404(
-        Post.objects.select_related('author').prefetch_related(
-            Prefetch('comments', Comment.objects.select_related('author'))
-        ),
+        Post.objects.select_related('author__profile', 'group'),
         pk=post_id
     )
+    # Форму выводит дыра comment_form: страница общая в кэше.
+    # Форма в контексте — часть контракта view, её проверяют тесты
+    # страницы поста (tests/test_post.py), шаблон её не читает.
     form = CommentForm()
+    comments = comments_page(post)
+    tag_page(
+        request, f'post:{post.pk}', *post_tags([post]),
+        *(f'author:{comment.author_id}' for comment in comments)
+    )
     context = {
         'post': post,
         'form': form,
+        'comments': comments,
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста.
+
+    Для запросов из скрипта отдаётся HTML-фрагмент, с ?format=json —
+    JSON, без скрипта — отдельная страница со ссылкой на продолжение.
+    """
+    post = get_object_or_404(Post, pk=post_id)
+    comments = comments_page(post, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next': comments.paginator.next_cursor,
+        })
+    template = 'posts/comments.html'
+    if request.is_ajax():
+        template = 'posts/includes/comments.html'
+    context = {
+        'post': post,
+        'comments': comments,
+        'title': f'Комментарии к записи {post.pk}',
     }
     return render(request, template, context)
 
@@ -133,6 +267,7 @@ def post_create(request):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        thumbnails.pregenerate(new_post.image, 'post')
         return redirect('posts:profile', request.user.username)
     return render(request, template, {'form': form, 'title': 'Новый пост'})
 
@@ -150,7 +285,9 @@ def post_edit(request, post_id):
         files=request.FILES or None
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            thumbnails.pregenerate(post.image, 'post')
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -170,12 +307,38 @@ def post_del(request, post_id):
     return redirect('posts:index')
 
 
+def follow_page(request, paginate=paginator):
+    """Страница ленты подписок способом из FOLLOW_FEED_ENGINE.
+
+    paginate(request, queryset) листает материализованную ленту
+    и исходный запрос; слияние курсоров всегда листается курсором.
+    """
+    engine = settings.FOLLOW_FEED_ENGINE
+    if engine == 'heap':
+        author_ids = request.user.follower.values_list('author_id', flat=True)
+        return HeapMergePaginator(
+            author_ids, settings.POSTS_NUM
+        ).get_page(request.GET.get('cursor'))
+    if engine == 'join':
+        posts = Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group')
+        return paginate(request, posts)
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group'
+    )
+    page_obj = paginate(request, entries)
+    page_obj.object_list = [entry.post for entry in page_obj]
+    return page_obj
+
+
 @login_required
 def follow_index(request):
     """Подписки пользователя."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    page_obj = follow_page(request)
     context = {
-        'page_obj': paginator(request.GET.get('page'), posts),
+        'page_obj': page_obj,
+        'thumbnail_batch': thumbnail_batch(page_obj),
         'title': 'Ваши подписки',
     }
     return render(request, 'posts/follow.html', context)
@@ -186,7 +349,10 @@ def profile_follow(request, username):
     """Подписка на автора."""
     author = User.objects.get(username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        # Проверка и вставка — одна запись очереди, без гонки.
+        writer.run(
+            Follow.objects.get_or_create, user=request.user, author=author
+        )
     return redirect('posts:follow_index')
 
 
@@ -194,7 +360,7 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Отписка от автора."""
     author = User.objects.get(username=username)
-    Follow.objects.filter(
+    writer.run(Follow.objects.filter(
         user=request.user,
-        author=author).delete()
+        author=author).delete)
     return redirect('posts:follow_index')
@@ -0,0 +1,30 @@
+// Подгрузка следующих порций комментариев и общий диалог удаления.
+document.addEventListener('click', function (event) {
+  const link = event.target.closest('[data-comments-more]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  link.classList.add('disabled');
+  fetch(link.href, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      // Фрагмент содержит порцию комментариев и новую кнопку «Показать ещё».
+      link.parentElement.outerHTML = html;
+    })
+    .catch(function () {
+      link.classList.remove('disabled');
+    });
+});
+
+document.addEventListener('show.bs.modal', function (event) {
+  const button = event.relatedTarget;
+  if (event.target.id === 'deleteCommentModal' && button) {
+    event.target.querySelector('form').action = button.dataset.action;
+  }
+});
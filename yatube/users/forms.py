@@ -1,6 +1,11 @@
+from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 
+from core.images import UploadLimitFormMixin, clean_image_field
+
+from .models import Profile
+
 
 User = get_user_model()
 
@@ -10,3 +15,13 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class ProfileForm(UploadLimitFormMixin, forms.ModelForm):
+    """Форма редактирования профиля."""
+    class Meta:
+        model = Profile
+        fields = ('bio', 'profile_pic')
+
+    def clean_profile_pic(self):
+        return clean_image_field(self, 'profile_pic')
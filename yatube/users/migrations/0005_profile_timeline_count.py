@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_timelineentry'),
+        ('users', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timeline_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            'UPDATE users_profile SET timeline_count = ('
+            '  SELECT COUNT(*) FROM posts_timelineentry'
+            '  WHERE posts_timelineentry.user_id = users_profile.user_id'
+            ')',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_profile_timeline_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
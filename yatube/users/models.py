@@ -3,16 +3,32 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from core.models import CountersMixin
+
 
 User = get_user_model()
 
 
-class Profile(models.Model):
+class Profile(CountersMixin, models.Model):
     """Расширение модели пользователя."""
+    counter_fields = ('posts_count', 'followers_count', 'following_count')
+
     user = models.OneToOneField(User, null=True, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
     profile_pic = models.ImageField(
         null=True, blank=True, upload_to="profile_pic/",)
+    profile_pic_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    profile_pic_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    profile_pic_hash = models.CharField(
+        max_length=64, blank=True, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    # Оценка сверху длины ленты подписок: по ней обрезаются только
+    # переросшие ленты (posts.timeline.trim).
+    timeline_count = models.PositiveIntegerField(default=0, editable=False)
 
     @receiver(post_save, sender=User)
     def create_user_profile(sender, instance, created, **kwargs):
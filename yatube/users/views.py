@@ -2,7 +2,9 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, UpdateView
 
-from .forms import CreationForm
+from core import thumbnails
+
+from .forms import CreationForm, ProfileForm
 from .models import Profile
 
 
@@ -16,8 +18,14 @@ class SignUp(CreateView):
 class ProfileEditView(LoginRequiredMixin, UpdateView):
     """Редактирование профиля."""
     model = Profile
-    fields = ('bio', 'profile_pic')
+    form_class = ProfileForm
     success_url = reverse_lazy('posts:index')
 
     def get_object(self):
         return self.request.user.profile
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'profile_pic' in form.changed_data:
+            thumbnails.pregenerate(self.object.profile_pic, 'profile')
+        return response
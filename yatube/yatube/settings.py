@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,6 +28,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -37,20 +39,29 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
+    'core.timing.ServerTimingMiddleware',
+    'core.nplusone.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.holes.HolePunchMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Тулбар тормозит каждый запрос, поэтому подключается только при отладке.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -60,7 +71,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,9 +96,31 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Постоянные соединения: прагмы не выполняются на каждый запрос.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Прагмы каждого соединения SQLite (core.sqlite), journal_mode — первой.
+# WAL не блокирует чтение лент записью, busy_timeout ждёт освобождения
+# базы вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 5000,
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+# Очередь записи (core.writer): сохранения постов, комментариев
+# и подписок из потоков запросов выполняет один поток на базу,
+# до WRITE_QUEUE_BATCH записей за транзакцию.
+WRITE_QUEUE = False
+WRITE_QUEUE_BATCH = 50
+WRITE_QUEUE_WAIT = 0.002
+WRITE_QUEUE_TIMEOUT = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -135,14 +168,122 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 POSTS_NUM = 10
+# Комментариев на странице поста и в каждой догружаемой порции.
+COMMENTS_NUM = 20
+# 'cursor' — листание по ключу (pub_date, id), 'pages' — номера страниц.
+POSTS_PAGINATION = 'cursor'
+# Сколько последних постов хранится в материализованной ленте подписок.
+TIMELINE_LENGTH = 1000
+# Лента обрезается, когда перерастает TIMELINE_LENGTH на столько записей:
+# обрезка идёт раз в TIMELINE_TRIM_SLACK постов, а не после каждого.
+TIMELINE_TRIM_SLACK = 100
+TIMELINE_BATCH_SIZE = 500
+# Движок ленты подписок: 'timeline' — материализованная лента,
+# 'heap' — слияние курсоров по авторам, 'join' — прямой запрос с JOIN.
+FOLLOW_FEED_ENGINE = 'timeline'
+HEAP_FEED_AUTHORS_PER_QUERY = 100
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Ограничения и нормализация загружаемых картинок.
+IMAGE_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+IMAGE_MAX_PIXELS = 60_000_000
+IMAGE_MAX_EDGE = 2048
+IMAGE_QUALITY = 85
+# Размер файла проверяется по мере приёма, до буферизации.
+FILE_UPLOAD_HANDLERS = [
+    'core.images.UploadLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Миниатюры создаются фоновым пулом потоков; 0 — синхронно.
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_RETRY_TIMEOUT = 60 * 5
+THUMBNAIL_PRESETS = {
+    'post': ('960x339', {'crop': 'center', 'upscale': True}),
+    'profile': ('200x150', {'crop': '80% top'}),
+}
+
+# Страницы, которые гостям отдаются из кэша целиком (при DEBUG = False).
+PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post_detail',
+)
+PAGE_CACHE_TIMEOUT = 600
+# Фрагменты лент сбрасываются сигналами, поэтому срок жизни длинный.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# Поколения фрагментов, ETag и кэш страниц держатся на счётчиках в кэше.
+# У LocMemCache он свой в каждом процессе, и правка в одном воркере
+# не видна другим: там поколения и фрагменты живут не дольше этого
+# срока. Для нескольких воркеров нужен общий кэш (Memcached, Redis).
+FRAGMENT_LOCAL_TIMEOUT = 60
+
+# Доля запросов, для которых пишутся Server-Timing и строка журнала.
+SERVER_TIMING_SAMPLE_RATE = 0.05
+# Файл для строк JSON с замерами; None — журнал не пишется.
+SERVER_TIMING_LOG = None
+
+# Метрики /metrics: файлы процессов и частота их записи.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+METRICS_FLUSH_INTERVAL = 1
+METRICS_NAMESPACES = ('posts', 'users', 'about')
+# Токен для заголовка Authorization: Bearer; None — /metrics выключен.
+METRICS_TOKEN = None
+
+# Журнал запросов дольше SLOW_QUERY_THRESHOLD секунд; одинаковые
+# запросы пишутся не чаще раза в SLOW_QUERY_LOG_INTERVAL секунд.
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG_INTERVAL = 60
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+# Поиск N+1 по ленивым загрузкам связей: для разработки и стенда.
+NPLUSONE_DETECT = DEBUG
+NPLUSONE_RAISE = False
+NPLUSONE_THRESHOLD = 2
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        # Замеры (core.timing) пишутся, только если задан SERVER_TIMING_LOG.
+        'timing': {
+            'class': 'logging.FileHandler',
+            'filename': SERVER_TIMING_LOG,
+            'encoding': 'utf-8',
+            'delay': True,
+        } if SERVER_TIMING_LOG else {'class': 'logging.NullHandler'},
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# core.timing.TimedCache считает попадания для замеров и метрик
+# и передаёт остальное бэкенду из TIMED_BACKEND.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.timing.TimedCache',
+        'TIMED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }